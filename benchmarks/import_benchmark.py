@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points, each imported in a fresh interpreter under -X importtime
+ENTRY_POINTS = {
+    'headless': 'import pipeline',
+    'gui': 'import main',
+}
+
+# Frameworks that must only load once the network or plotting code actually runs
+DEFERRED = ['tensorflow', 'keras', 'seaborn', 'matplotlib']
+
+
+def import_times(code):
+    # -X importtime writes "import time: self [us] | cumulative | imported package" lines to stderr
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr.strip().splitlines()[-1])
+    modules = {}
+    total_us = 0
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split(':', 1)[1].split('|')
+        top_level = not name.startswith('  ')
+        name = name.strip()
+        modules[name] = int(cumulative_us)
+        if top_level:
+            total_us += int(cumulative_us)
+    return total_us / 1e6, modules
+
+
+def measure(code, repeats):
+    runs = [import_times(code) for _ in range(repeats)]
+    total_s, modules = min(runs, key=lambda run: run[0])
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:10]
+    loaded = sorted({name.split('.')[0] for name in modules} & set(DEFERRED))
+    return {
+        'import_s': total_s,
+        'deferred_loaded': loaded,
+        'slowest': [{'module': name, 'cumulative_s': us / 1e6} for name, us in slowest],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time regression check for the GUI and headless entry points")
+    parser.add_argument('--entry-points', nargs='+', default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, help="fail when an entry point takes longer than this to import")
+    parser.add_argument('--json', action='store_true', help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    report = {name: measure(ENTRY_POINTS[name], args.repeats) for name in args.entry_points}
+    failures = []
+    for name, result in report.items():
+        if result['deferred_loaded']:
+            failures.append(f"{name} imports {', '.join(result['deferred_loaded'])} at startup")
+        if args.max_seconds is not None and result['import_s'] > args.max_seconds:
+            failures.append(f"{name} import took {result['import_s']:.3f}s (limit {args.max_seconds:.3f}s)")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'entry point':<14}{'import (s)':>12}  slowest modules")
+        for name, result in report.items():
+            slowest = ', '.join(f"{item['module']} {item['cumulative_s']:.2f}s" for item in result['slowest'][:3])
+            print(f"{name:<14}{result['import_s']:>12.3f}  {slowest}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
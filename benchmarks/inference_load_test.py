@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request_json(url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def load_rows(dataset_path, features):
+    # Request bodies come from the dataset the served version was trained on
+    df = pd.read_csv(dataset_path, usecols=features)
+    return df.astype(object).where(df.notna(), None)
+
+
+def run_load(url, rows, requests, concurrency, rows_per_request, seed=0):
+    rng = np.random.default_rng(seed)
+    bodies = []
+    for _ in range(requests):
+        sample = rows.iloc[rng.integers(len(rows), size=rows_per_request)]
+        bodies.append({'columns': list(sample.columns), 'data': sample.values.tolist()})
+
+    def send(body):
+        start = time.perf_counter()
+        request_json(f'{url}/predict', body)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(send, bodies))
+    elapsed = time.perf_counter() - start
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'rows_per_request': rows_per_request,
+        'elapsed_s': elapsed,
+        'requests_per_s': requests / elapsed,
+        'rows_per_s': requests * rows_per_request / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive a running inference_server.py from local clients")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--dataset', help="CSV to draw request rows from, defaults to the served version's dataset")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--rows-per-request', type=int, default=1)
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    model = request_json(f'{args.url}/model')
+    rows = load_rows(args.dataset or model['dataset_path'], model['features'])
+    report = {'model': model, 'runs': []}
+    for concurrency in args.concurrency:
+        result = run_load(args.url, rows, args.requests, concurrency, args.rows_per_request)
+        report['runs'].append(result)
+        print(f"concurrency {concurrency}: {result['requests_per_s']:.0f} req/s, "
+              f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms", file=sys.stderr)
+    report['server_metrics'] = request_json(f'{args.url}/metrics')
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dataset_cache import DatasetCache, load_dataset
+from pipeline import AutoMLPipeline
+from training_engine import score_predictions
+
+# name -> (file, problem statement, target column)
+DATASETS = {
+    'house_prices': ('house_prices.csv', "Predict the house prices based on various features like size, location, and number of rooms", 'Price'),
+    'iris': ('Iris.csv', "Predict the class of Species for iris flowers", 'Species'),
+}
+
+
+def scale_rows(df, factor, seed=0):
+    # Resampled rows with a little noise on numeric columns, so the data is not just repeated
+    rng = np.random.default_rng(seed)
+    scaled = df.sample(len(df) * factor, replace=True, random_state=seed).reset_index(drop=True)
+    numeric = scaled.select_dtypes(include=['float']).columns
+    scaled[numeric] = scaled[numeric] * rng.normal(1.0, 0.01, size=(len(scaled), len(numeric)))
+    return scaled
+
+
+def scale_columns(df, factor, target, seed=0):
+    # Noisy copies of the numeric feature columns; the target and text columns are kept once
+    rng = np.random.default_rng(seed)
+    numeric = [col for col in df.select_dtypes(include=['number']).columns if col != target]
+    copies = [df]
+    for i in range(1, factor):
+        block = df[numeric].astype(float) * rng.normal(1.0, 0.05, size=(len(df), len(numeric)))
+        copies.append(block.add_suffix(f'_copy{i}'))
+    return pd.concat(copies, axis=1)
+
+
+def variants(name, path, target, scales, work_dir):
+    yield f'{name}', path
+    df = pd.read_csv(path)
+    for factor in scales:
+        if factor == 1:
+            continue
+        for kind, scaled in (('rows', scale_rows(df, factor)), ('cols', scale_columns(df, factor, target))):
+            scaled_path = os.path.join(work_dir, f'{name}_{kind}x{factor}.csv')
+            scaled.to_csv(scaled_path, index=False)
+            yield f'{name}_{kind}x{factor}', scaled_path
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+
+def run_once(path, statement, timer, skip_nn, output_dir, dataset_cache, cold):
+    pipeline = AutoMLPipeline(n_jobs=1)
+    pipeline.preload_nlp()
+    pipeline.get_nlp('parser')
+
+    # Loaded as the pipeline and GUI load it: the first run parses the CSV and fills the
+    # dataset cache, later runs read the cached copy
+    df = timer.time('load_dataset.cold' if cold else 'load_dataset.cached', load_dataset, path, cache=dataset_cache)
+    pipeline.problem_type = timer.time('analyze_problem_statement', pipeline.analyze_problem_statement, statement)
+    target_col, feature_cols = timer.time('identify_features', pipeline.identify_features, df, statement)
+    X_train, X_test, y_train, y_test = timer.time('preprocess_data', pipeline.split_and_preprocess, df, feature_cols, target_col)
+    problem_type = pipeline.problem_type
+
+    models = {}
+    for name, model in pipeline.candidate_models(problem_type).items():
+        timer.time(f'fit.{name}', model.fit, X_train, y_train)
+        y_pred = timer.time(f'predict.{name}', model.predict, X_test)
+        score_predictions(problem_type, X_test, y_test, y_pred)
+        models[name] = model
+    if not skip_nn and problem_type in ['classification', 'regression']:
+        nn_model = timer.time('fit.neural_network', pipeline._train_neural_network, problem_type, X_train, y_train)
+        timer.time('predict.neural_network', pipeline._predict_neural_network, problem_type, nn_model, X_test)
+        models['neural_network'] = nn_model
+
+    timer.time('save_models', pipeline.save_models, models, output_dir)
+    return {'rows': len(df), 'columns': df.shape[1], 'problem_type': problem_type, 'target': target_col}
+
+
+def summarize(timings):
+    return {
+        stage: {'min_s': min(values), 'median_s': statistics.median(values), 'runs': len(values)}
+        for stage, values in timings.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every stage of the AutoML pipeline and emit JSON")
+    parser.add_argument('--datasets', nargs='+', default=list(DATASETS), choices=list(DATASETS))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10, 100])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--skip-nn', action='store_true', help="skip the Keras network stages")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': [],
+    }
+    work_dir = tempfile.mkdtemp(prefix='autods_bench_')
+    try:
+        for name in args.datasets:
+            path, statement, target = DATASETS[name]
+            for variant, variant_path in variants(name, os.path.join(ROOT, path), target, args.scales, work_dir):
+                timer = StageTimer()
+                dataset_cache = DatasetCache(os.path.join(work_dir, 'dataset_cache', variant))
+                for repeat in range(args.repeats):
+                    info = run_once(variant_path, statement, timer, args.skip_nn, os.path.join(work_dir, 'saved_models'),
+                                    dataset_cache, cold=repeat == 0)
+                report['results'].append({'dataset': variant, **info, 'stages': summarize(timer.stages)})
+                print(f"{variant}: {sum(min(v) for v in timer.stages.values()):.3f}s", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
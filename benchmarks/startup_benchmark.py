@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each scenario runs in a fresh interpreter so nothing is already imported or loaded
+BEFORE = """
+import time
+start = time.perf_counter()
+import spacy
+nlp = spacy.load('en_core_web_sm')
+ready = time.perf_counter() - start
+nlp('predict the price of the house')
+print(ready, time.perf_counter() - start)
+"""
+
+AFTER = """
+import time
+start = time.perf_counter()
+from pipeline import AutoMLPipeline
+pipeline = AutoMLPipeline()
+ready = time.perf_counter() - start
+pipeline.analyze_problem_statement('predict the price of the house')
+print(ready, time.perf_counter() - start)
+"""
+
+AFTER_PRELOAD = """
+import time
+start = time.perf_counter()
+from pipeline import AutoMLPipeline
+pipeline = AutoMLPipeline()
+pipeline.preload_nlp()
+ready = time.perf_counter() - start
+pipeline.analyze_problem_statement('predict the price of the house')
+print(ready, time.perf_counter() - start)
+"""
+
+SCENARIOS = {
+    'before (full spacy.load)': BEFORE,
+    'after (lazy)': AFTER,
+    'after (background preload)': AFTER_PRELOAD,
+}
+
+def run_scenario(code, repeats):
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        ready, first_analysis = map(float, output.stdout.split()[-2:])
+        timings.append((ready, first_analysis))
+    return min(timings)
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"{'scenario':<30}{'ready (s)':>12}{'first analysis (s)':>22}")
+    for name, code in SCENARIOS.items():
+        ready, first_analysis = run_scenario(code, repeats)
+        print(f"{name:<30}{ready:>12.3f}{first_analysis:>22.3f}")
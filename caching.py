@@ -0,0 +1,86 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_MISSING = object()
+
+
+class LRUCache:
+    # Thread-safe least-recently-used cache with hit/miss counters
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+def normalize_statement(statement):
+    return ' '.join(statement.lower().split())
+
+
+def schema_fingerprint(df):
+    # Column names and dtype kinds only, so int8/int64 downcasts of the same export match
+    digest = hashlib.blake2b(digest_size=16)
+    for column, dtype in df.dtypes.items():
+        digest.update(f'{column}\x1f{dtype.kind}\x1e'.encode())
+    return digest.hexdigest()
+
+
+def array_fingerprint(*arrays):
+    # Content hash of the training data, so cached results are only reused on identical data
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f'{array.shape}{array.dtype}'.encode())
+        digest.update(array.data)
+    return digest.hexdigest()
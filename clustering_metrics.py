@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+from scipy import sparse
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score, silhouette_score
+
+# Exact silhouette needs all pairwise distances (O(n^2)); above this many rows it is estimated
+SILHOUETTE_EXACT_MAX_ROWS = 10_000
+SILHOUETTE_SAMPLE_ROWS = 2_000
+SILHOUETTE_REPEATS = 10
+# Calinski-Harabasz and Davies-Bouldin are O(n * k) and computed at every size
+CHUNK_ROWS = 100_000
+
+
+def sampled_silhouette(X, labels, sample_rows=SILHOUETTE_SAMPLE_ROWS, repeats=SILHOUETTE_REPEATS, random_state=42):
+    # Mean silhouette over independent row samples with a normal 95% confidence interval
+    rng = np.random.default_rng(random_state)
+    scores = []
+    for _ in range(repeats):
+        rows = rng.choice(len(X), size=min(sample_rows, len(X)), replace=False)
+        sample_labels = labels[rows]
+        n_labels = len(np.unique(sample_labels))
+        # A sample can miss clusters; with fewer than two it has no silhouette
+        if 2 <= n_labels < len(rows):
+            scores.append(silhouette_score(X[rows], sample_labels))
+    if not scores:
+        raise ValueError("Silhouette is undefined: every sample contained a single cluster")
+    mean = float(np.mean(scores))
+    half_width = 1.96 * float(np.std(scores, ddof=1)) / math.sqrt(len(scores)) if len(scores) > 1 else float('nan')
+    return mean, (mean - half_width, mean + half_width)
+
+
+def inertia(X, labels):
+    # Sum of squared distances to each cluster's centroid, in row chunks to bound memory
+    _, codes = np.unique(labels, return_inverse=True)
+    assignment = sparse.csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))))
+    centroids = (assignment @ X) / np.bincount(codes)[:, None]
+    total = 0.0
+    for start in range(0, len(X), CHUNK_ROWS):
+        diff = X[start:start + CHUNK_ROWS] - centroids[codes[start:start + CHUNK_ROWS]]
+        total += float(np.einsum('ij,ij->', diff, diff))
+    return total
+
+
+def estimate_silhouette(X, labels, mode='auto', sample_rows=SILHOUETTE_SAMPLE_ROWS, repeats=SILHOUETTE_REPEATS, random_state=42):
+    # mode: 'exact' or 'sampled', 'auto' switches to sampling above SILHOUETTE_EXACT_MAX_ROWS.
+    # Returns (score, confidence interval or None, mode used)
+    if mode == 'auto':
+        mode = 'exact' if len(X) <= SILHOUETTE_EXACT_MAX_ROWS else 'sampled'
+    if mode == 'exact':
+        return float(silhouette_score(X, labels)), None, mode
+    return (*sampled_silhouette(X, labels, sample_rows, repeats, random_state), mode)
+
+
+def evaluate_clustering(X, labels, mode='auto', sample_rows=SILHOUETTE_SAMPLE_ROWS, repeats=SILHOUETTE_REPEATS, random_state=42):
+    # silhouette_score comes first, callers that keep one metric use it
+    X = np.asarray(X, dtype=np.float64)
+    labels = np.asarray(labels)
+    silhouette, interval, mode = estimate_silhouette(X, labels, mode, sample_rows, repeats, random_state)
+    return {
+        'silhouette_score': silhouette,
+        'silhouette_ci': interval,
+        'silhouette_method': mode,
+        'calinski_harabasz': float(calinski_harabasz_score(X, labels)),
+        'davies_bouldin': float(davies_bouldin_score(X, labels)),
+        'inertia': inertia(X, labels),
+        'rows': len(X),
+    }
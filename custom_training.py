@@ -3,11 +3,9 @@ from sklearn.linear_model import LogisticRegression, LinearRegression
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.metrics import accuracy_score, mean_squared_error
 from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
 
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
-from tensorflow.keras.optimizers import Adam
+from clustering_metrics import evaluate_clustering
+from neural_training import build_network, fit_network, predict_network
 
 def train_custom_model(problem_type, model_name, params, X_train, X_test, y_train, y_test):
     model = None
@@ -18,15 +16,10 @@ def train_custom_model(problem_type, model_name, params, X_train, X_test, y_trai
         elif model_name == 'random_forest':
             model = RandomForestClassifier(**params)
         elif model_name == 'neural_network':
-            model = Sequential([
-                Dense(64, activation='relu', input_shape=(X_train.shape[1],)),
-                Dense(32, activation='relu'),
-                Dense(len(np.unique(y_train)), activation='softmax')
-            ])
-            model.compile(optimizer=Adam(), loss='sparse_categorical_crossentropy', metrics=['accuracy'])
-            model.fit(X_train, y_train, epochs=params['epochs'], batch_size=params['batch_size'], verbose=0)
-            score = model.evaluate(X_test, y_test, verbose=0)
-            return {'accuracy': score[1]}  # Return accuracy
+            model = build_network(problem_type, X_train.shape[1], len(np.unique(y_train)))
+            fit_network(problem_type, model, X_train, y_train, epochs=params['epochs'], batch_size=params['batch_size'])
+            predictions = predict_network(problem_type, model, X_test)
+            return {'accuracy': accuracy_score(y_test, predictions)}
 
     elif problem_type == 'regression':
         if model_name == 'linear_regression':
@@ -34,23 +27,18 @@ def train_custom_model(problem_type, model_name, params, X_train, X_test, y_trai
         elif model_name == 'random_forest':
             model = RandomForestRegressor(**params)
         elif model_name == 'neural_network':
-            model = Sequential([
-                Dense(64, activation='relu', input_shape=(X_train.shape[1],)),
-                Dense(32, activation='relu'),
-                Dense(1)
-            ])
-            model.compile(optimizer=Adam(), loss='mse')
-            model.fit(X_train, y_train, epochs=params['epochs'], batch_size=params['batch_size'], verbose=0)
-            predictions = model.predict(X_test).flatten()
+            model = build_network(problem_type, X_train.shape[1])
+            fit_network(problem_type, model, X_train, y_train, epochs=params['epochs'], batch_size=params['batch_size'])
+            predictions = predict_network(problem_type, model, X_test)
             return {'mse': mean_squared_error(y_test, predictions)}
 
     elif problem_type == 'unsupervised':
         if model_name == 'kmeans':
             model = KMeans(**params)
             predictions = model.fit_predict(X_test)
-            return {'silhouette_score': silhouette_score(X_test, predictions)}
+            return evaluate_clustering(X_test, predictions)
 
-    if model:
+    if model is not None:
         model.fit(X_train, y_train)
         if problem_type == 'classification':
             predictions = model.predict(X_test)
@@ -60,3 +48,32 @@ def train_custom_model(problem_type, model_name, params, X_train, X_test, y_trai
             return {'mse': mean_squared_error(y_test, predictions)}
     
     raise ValueError("Invalid combination or parameters.")
+
+def sweep_forest_estimators(problem_type, params, n_estimators_values, X_train, X_test, y_train, y_test):
+    # Grows one warm-started forest through every n_estimators value instead of refitting from scratch,
+    # and scores only the newly added trees at each step, so the sweep costs as much as the largest forest
+    params = {key: value for key, value in params.items() if key != 'n_estimators'}
+    if problem_type == 'classification':
+        model = RandomForestClassifier(warm_start=True, **params)
+    elif problem_type == 'regression':
+        model = RandomForestRegressor(warm_start=True, **params)
+    else:
+        raise ValueError("Invalid combination or parameters.")
+
+    X_test = np.asarray(X_test, dtype=np.float32)
+    curve = []
+    total = None
+    n_trees = 0
+    for n_estimators in sorted(set(int(value) for value in n_estimators_values)):
+        model.set_params(n_estimators=n_estimators)
+        model.fit(X_train, y_train)
+        for tree in model.estimators_[n_trees:]:
+            tree_output = tree.predict_proba(X_test) if problem_type == 'classification' else tree.predict(X_test)
+            total = tree_output if total is None else total + tree_output
+        n_trees = len(model.estimators_)
+        if problem_type == 'classification':
+            predictions = model.classes_.take(np.argmax(total, axis=1))
+            curve.append((n_estimators, {'accuracy': accuracy_score(y_test, predictions)}))
+        else:
+            curve.append((n_estimators, {'mse': mean_squared_error(y_test, total / n_trees)}))
+    return model, curve
@@ -1,7 +1,5 @@
 import sys
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
+import threading
 
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QListWidget, QLabel,
@@ -10,6 +8,10 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QPixmap
 from PySide6.QtCore import Qt
 
+import dataset_cache
+from dataset_loading import DatasetLoader
+from plot_rendering import PlotRenderer, plot_key, render_chart
+
 
 class CustomVisualizer(QWidget):
     def __init__(self):
@@ -18,6 +20,12 @@ class CustomVisualizer(QWidget):
         self.setMinimumSize(800, 600)
 
         self.df = None
+        self.dataset_key = None
+
+        # Charts are drawn off the GUI thread, a newer request replaces a pending one
+        self.renderer = PlotRenderer(parent=self)
+        self.renderer.rendered.connect(self.show_rendered_plot)
+        self.renderer.failed.connect(self.show_plot_error)
 
         layout = QVBoxLayout(self)
 
@@ -54,9 +62,32 @@ class CustomVisualizer(QWidget):
     def load_dataset(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open CSV", "", "CSV Files (*.csv)")
         if file_path:
-            self.df = pd.read_csv(file_path)
-            self.feature_list.clear()
-            self.feature_list.addItems(self.df.columns)
+            # Parsed in the background, the button shows the progress
+            self.file_path = file_path
+            self.load_btn.setEnabled(False)
+            self.load_btn.setText("Loading...")
+            self.loader = DatasetLoader(file_path)
+            self.loader.progress.connect(self.handle_load_progress)
+            self.loader.finished.connect(self.handle_dataset_loaded)
+            self.loader.error.connect(self.handle_load_error)
+            threading.Thread(target=self.loader.run, daemon=True).start()
+
+    def handle_load_progress(self, percent):
+        self.load_btn.setText(f"Loading... {percent}%")
+
+    def handle_dataset_loaded(self, df):
+        self.load_btn.setEnabled(True)
+        self.load_btn.setText("Load CSV")
+        self.df = df
+        # Identifies the data in the plot cache, the file was hashed while it was loaded
+        self.dataset_key = (dataset_cache.DatasetCache().content_hash(self.file_path), len(df))
+        self.feature_list.clear()
+        self.feature_list.addItems(df.columns)
+
+    def handle_load_error(self, error_msg):
+        self.load_btn.setEnabled(True)
+        self.load_btn.setText("Load CSV")
+        QMessageBox.critical(self, "Load Error", error_msg)
 
     def generate_chart(self):
         if self.df is None:
@@ -71,58 +102,23 @@ class CustomVisualizer(QWidget):
             return
 
         chart = self.chart_type.currentText()
-
-        plt.clf()
-        plt.figure(figsize=(6, 4))
-        sns.set_theme(style="whitegrid")
-
-        try:
-            if chart == "Histogram":
-                for col in selected_columns:
-                    if pd.api.types.is_numeric_dtype(self.df[col]):
-                        sns.histplot(self.df[col], kde=True, label=col)
-                plt.legend()
-                plt.title("Histogram")
-
-            elif chart == "Boxplot":
-                if len(selected_columns) == 1:
-                    sns.boxplot(y=self.df[selected_columns[0]])
-                else:
-                    sns.boxplot(data=self.df[selected_columns])
-                plt.title("Boxplot")
-
-            elif chart == "Violin Plot":
-                if len(selected_columns) == 1:
-                    sns.violinplot(y=self.df[selected_columns[0]])
-                elif len(selected_columns) == 2:
-                    sns.violinplot(x=self.df[selected_columns[0]], y=self.df[selected_columns[1]])
-                else:
-                    raise Exception("Violin Plot supports only 1 or 2 features.")
-
-            elif chart == "Scatter Plot":
-                if len(selected_columns) != 2:
-                    raise Exception("Scatter Plot requires exactly 2 features.")
-                sns.scatterplot(
-                    x=self.df[selected_columns[0]], y=self.df[selected_columns[1]]
-                )
-                plt.title("Scatter Plot")
-
-            elif chart == "Count Plot":
-                if len(selected_columns) != 1:
-                    raise Exception("Count Plot supports only 1 categorical feature.")
-                sns.countplot(x=self.df[selected_columns[0]])
-                plt.title("Count Plot")
-
-            else:
-                raise Exception("Unsupported chart type.")
-
-            plt.tight_layout()
-            plot_path = "custom_plot.png"
-            plt.savefig(plot_path)
-            self.plot_label.setPixmap(QPixmap(plot_path))
-
-        except Exception as e:
-            QMessageBox.critical(self, "Plot Error", str(e))
+        size = (self.plot_label.width(), self.plot_label.height())
+        self.renderer.request('chart', render_chart, self.df, chart, selected_columns, size,
+                              cache_key=plot_key(self.dataset_key, selected_columns, chart, size))
+
+    def closeEvent(self, event):
+        self.renderer.shutdown()
+        super().closeEvent(event)
+
+    def show_rendered_plot(self, target, request_id, png):
+        if self.renderer.is_current(target, request_id):
+            pixmap = QPixmap()
+            pixmap.loadFromData(png, 'PNG')
+            self.plot_label.setPixmap(pixmap)
+
+    def show_plot_error(self, target, request_id, message):
+        if self.renderer.is_current(target, request_id):
+            QMessageBox.critical(self, "Plot Error", message)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 200_000
+SAMPLE_ROWS = 50_000
+# Text columns whose distinct values are at most this share of the sampled rows are read as
+# categoricals: every value then repeats 20 times on average, so the codes save real memory
+CATEGORY_RATIO = float(os.environ.get('AUTODS_CATEGORY_RATIO', 0.05))
+
+
+def infer_compact_dtypes(sample, category_ratio=None):
+    # Integer and float columns are downcast per chunk, because the sample cannot
+    # see the value range of the whole file; only categoricals are fixed up front.
+    # Read at call time, the dataset cache keys entries by the current CATEGORY_RATIO
+    category_ratio = CATEGORY_RATIO if category_ratio is None else category_ratio
+    dtypes = {}
+    for column in sample.columns:
+        data = sample[column]
+        if pd.api.types.is_string_dtype(data.dtype) and len(data) and data.nunique() <= category_ratio * len(data):
+            dtypes[column] = 'category'
+    return dtypes
+
+
+def downcast_chunk(chunk):
+    for column in chunk.columns:
+        dtype = chunk[column].dtype
+        if pd.api.types.is_integer_dtype(dtype):
+            chunk[column] = pd.to_numeric(chunk[column], downcast='integer')
+        elif pd.api.types.is_float_dtype(dtype):
+            chunk[column] = pd.to_numeric(chunk[column], downcast='float')
+    return chunk
+
+
+def _unify_categories(chunks):
+    if not chunks:
+        return chunks
+    for column in chunks[0].columns:
+        if not all(isinstance(chunk[column].dtype, pd.CategoricalDtype) for chunk in chunks):
+            continue
+        categories = pd.Index(np.concatenate([chunk[column].cat.categories.to_numpy(dtype=object) for chunk in chunks])).unique()
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return chunks
+
+
+def _concat_columns(chunks):
+    # Joined one column at a time, popping each column's pieces from the chunks, so the chunks are
+    # released while the result is built instead of all being held next to a full copy.
+    # Integer widths differ between chunks; concat upcasts each column to the widest one seen
+    joined = []
+    for column in list(chunks[0].columns):
+        joined.append(pd.concat([chunk.pop(column) for chunk in chunks], ignore_index=True))
+    return pd.concat(joined, axis=1, copy=False)
+
+
+def read_csv_sample(path, sample_rows=SAMPLE_ROWS, **read_kwargs):
+    nrows = read_kwargs.pop('nrows', None)
+    return pd.read_csv(path, nrows=sample_rows if nrows is None else min(sample_rows, nrows), **read_kwargs)
+
+
+def iter_csv_chunks(path, chunksize=CHUNK_SIZE, sample_rows=SAMPLE_ROWS, progress=None, **read_kwargs):
+    # progress: optional callable(bytes_read, total_bytes) called after every chunk
+    dtypes = infer_compact_dtypes(read_csv_sample(path, sample_rows, **read_kwargs))
+    dtypes.update(read_kwargs.pop('dtype', None) or {})
+
+    total_bytes = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        for chunk in pd.read_csv(handle, chunksize=chunksize, dtype=dtypes, **read_kwargs):
+            yield downcast_chunk(chunk)
+            if progress is not None:
+                progress(min(handle.tell(), total_bytes), total_bytes)
+
+
+def read_csv_chunked(path, chunksize=CHUNK_SIZE, sample_rows=SAMPLE_ROWS, progress=None, **read_kwargs):
+    chunks = list(iter_csv_chunks(path, chunksize, sample_rows, progress, **read_kwargs))
+    if not chunks:
+        return read_csv_sample(path, sample_rows, **read_kwargs).iloc[0:0]
+    df = _concat_columns(_unify_categories(chunks))
+    if progress is not None:
+        total_bytes = os.path.getsize(path)
+        progress(total_bytes, total_bytes)
+    return df
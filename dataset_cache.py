@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+import data_loader
+from data_loader import read_csv_chunked, SAMPLE_ROWS
+
+CACHE_DIR = os.environ.get('AUTODS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'autods', 'datasets'))
+CACHE_MAX_BYTES = int(os.environ.get('AUTODS_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+# Bump when the loader changes what it produces, so old entries are no longer used
+CACHE_VERSION = 2
+INDEX_FILE = 'index.json'
+HASH_BLOCK = 4 * 1024 ** 2
+
+
+def file_digest(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def writable_frame(df):
+    # Arrow hands columns without nulls back as read-only views of the mapped file. Without
+    # copy-on-write, pandas writes into those buffers and assignment fails, unlike on a frame
+    # parsed from the CSV, so those columns are copied. With copy-on-write pandas copies on
+    # the first write itself.
+    if pd.options.mode.copy_on_write is True or int(pd.__version__.split('.')[0]) >= 3:
+        return df
+    for col in range(df.shape[1]):
+        values = df.iloc[:, col].to_numpy(copy=False)
+        if isinstance(values, np.ndarray) and not values.flags.writeable:
+            df.isetitem(col, values.copy())
+    return df
+
+
+class DatasetCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Hashing a multi-GB file on every load would undo most of the gain, so the content
+    # hash is remembered per (path, size, mtime) and only recomputed when the file changes
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        tmp_path = os.path.join(self.cache_dir, f'{INDEX_FILE}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.cache_dir, INDEX_FILE))
+
+    def content_hash(self, path):
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        index = self._read_index()
+        entry = index.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['hash']
+        digest = file_digest(path)
+        index[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest}
+        self._write_index(index)
+        return digest
+
+    def key(self, path, settings):
+        settings = json.dumps({'version': CACHE_VERSION, **settings}, sort_keys=True, default=str)
+        return hashlib.blake2b(f'{self.content_hash(path)}:{settings}'.encode(), digest_size=20).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.feather')
+
+    def get(self, key):
+        entry_path = self.entry_path(key)
+        try:
+            table = feather.read_table(entry_path, memory_map=True)
+        except (OSError, ValueError):
+            return None
+        # The entry's mtime is its last access time for LRU eviction
+        os.utime(entry_path)
+        return writable_frame(table.to_pandas(split_blocks=True))
+
+    def put(self, key, df):
+        entry_path = self.entry_path(key)
+        tmp_path = f'{entry_path}.{os.getpid()}.tmp'
+        # Uncompressed so later reads can memory-map the file instead of decoding it
+        feather.write_feather(df, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, entry_path)
+        self.evict()
+
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.feather'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append({'key': name[:-len('.feather')], 'size': stat.st_size, 'last_used': stat.st_mtime})
+        return sorted(entries, key=lambda entry: entry['last_used'], reverse=True)
+
+    def total_bytes(self):
+        return sum(entry['size'] for entry in self.entries())
+
+    def evict(self, max_bytes=None):
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries)
+        removed = []
+        # Least recently used entries are at the end of the list
+        while entries and total > max_bytes:
+            entry = entries.pop()
+            os.remove(self.entry_path(entry['key']))
+            total -= entry['size']
+            removed.append(entry['key'])
+        return removed
+
+    def clear(self):
+        removed = self.evict(max_bytes=0)
+        try:
+            os.remove(os.path.join(self.cache_dir, INDEX_FILE))
+        except FileNotFoundError:
+            pass
+        return removed
+
+
+def load_dataset(path, cache=None, progress=None, sample_rows=SAMPLE_ROWS, **read_kwargs):
+    # Drop-in for read_csv_chunked that serves unchanged files from the columnar cache
+    cache = cache or DatasetCache()
+    # The category threshold decides which text columns come back as categoricals
+    key = cache.key(path, {'sample_rows': sample_rows, 'category_ratio': data_loader.CATEGORY_RATIO, **read_kwargs})
+    df = cache.get(key)
+    if df is None:
+        df = read_csv_chunked(path, sample_rows=sample_rows, progress=progress, **read_kwargs)
+        cache.put(key, df)
+    elif progress is not None:
+        size = os.path.getsize(path)
+        progress(size, size)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clear the parsed dataset cache")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="list cached datasets, most recently used first")
+    commands.add_parser('info', help="show cache location and size")
+    commands.add_parser('clear', help="remove every cached dataset")
+    prune = commands.add_parser('prune', help="evict least recently used datasets down to a size")
+    prune.add_argument('max_bytes', type=int)
+    args = parser.parse_args(argv)
+
+    cache = DatasetCache(args.cache_dir)
+    if args.command == 'list':
+        for entry in cache.entries():
+            last_used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['last_used']))
+            print(f"{entry['key']}  {entry['size'] / 1024 ** 2:10.2f} MB  {last_used}")
+    elif args.command == 'info':
+        print(f"Cache directory: {cache.cache_dir}")
+        print(f"Entries: {len(cache.entries())}")
+        print(f"Size: {cache.total_bytes() / 1024 ** 2:.2f} MB of {cache.max_bytes / 1024 ** 2:.2f} MB")
+    elif args.command == 'clear':
+        print(f"Removed {len(cache.clear())} cached datasets")
+    elif args.command == 'prune':
+        print(f"Removed {len(cache.evict(args.max_bytes))} cached datasets")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+from PySide6.QtCore import QObject, Signal
+
+from dataset_cache import load_dataset
+from streaming_training import should_stream
+
+# Rows of a file trained out-of-core that are loaded for viewing
+STREAMING_PREVIEW_ROWS = 1_000_000
+
+
+class DatasetLoader(QObject):
+    # Loads a CSV through the dataset cache off the GUI thread, reporting the parse in percent
+    progress = Signal(int)
+    finished = Signal(object)
+    error = Signal(str)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            # Files that are trained out-of-core are only previewed
+            nrows = STREAMING_PREVIEW_ROWS if should_stream(self.path) else None
+            df = load_dataset(self.path, nrows=nrows, progress=lambda done, total: self.progress.emit(int(done * 100 / max(total, 1))))
+            self.finished.emit(df)
+        except Exception as e:
+            self.error.emit(str(e))
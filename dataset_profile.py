@@ -0,0 +1,263 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, Signal
+
+from caching import LRUCache
+from plot_aggregation import binned_kde
+
+# Profiles of recently opened datasets, keyed by the caller (content hash and row count in the GUI)
+PROFILE_CACHE = LRUCache(8)
+# One build at a time, so a view asking while the background build runs waits for its result
+_BUILD_LOCK = threading.Lock()
+
+SUMMARY_COLUMNS = ['Feature', 'Type', 'Nulls', 'Unique', 'Min', 'Max', 'Mean', 'Mode']
+# Most frequent values kept per column, enough for complete counts of low-cardinality columns
+TOP_VALUES = 10
+# Matches the histogram the feature plot draws
+HIST_BINS = 30
+IQR_WHISKER = 1.5
+
+
+def _numeric_columns(df):
+    return [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+
+
+def _block_runs(sorted_block, n_valid, top_k=TOP_VALUES):
+    # Unique counts and the top_k most frequent values with their counts per column of a
+    # column-sorted block (NaNs sorted last), smaller values first on ties.
+    # Runs of equal values are found for all columns at once.
+    n_rows, n_cols = sorted_block.shape
+    new_run = np.empty(sorted_block.shape, dtype=bool)
+    new_run[:1] = True
+    np.not_equal(sorted_block[1:], sorted_block[:-1], out=new_run[1:])
+    new_run &= np.arange(n_rows)[:, None] < n_valid[None, :]
+
+    # Flat positions in column-major order, so every column's runs are contiguous
+    starts = np.flatnonzero(new_run.T)
+    start_cols = starts // n_rows
+    column_ends = start_cols * n_rows + n_valid[start_cols]
+    ends = np.minimum(np.append(starts[1:], n_rows * n_cols), column_ends)
+    lengths = ends - starts
+
+    unique = np.bincount(start_cols, minlength=n_cols)
+    # Longest run first within each column, earlier (smaller) value first among equal lengths
+    order = np.lexsort((starts, -lengths, start_cols))
+    first = np.searchsorted(start_cols[order], np.arange(n_cols))
+    top = []
+    for col in range(n_cols):
+        runs = order[first[col]:first[col] + min(top_k, unique[col])]
+        top.append((sorted_block[starts[runs] % n_rows, col], lengths[runs]))
+    return unique, top
+
+
+def _restore(value, dtype):
+    # Block statistics are float64, int and bool columns show their own type again
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if dtype.kind in 'iu':
+        return int(value)
+    if dtype.kind == 'b':
+        return bool(value)
+    return value
+
+
+def _sorted_quantiles(sorted_block, n_valid, q):
+    # Linear-interpolated quantile q of each column's valid rows, as pandas computes it
+    columns = np.arange(sorted_block.shape[1])
+    if not len(sorted_block):
+        return np.full(len(columns), np.nan)
+    position = q * np.maximum(n_valid - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, np.maximum(n_valid - 1, 0))
+    fraction = position - lower
+    with np.errstate(invalid='ignore'):
+        values = sorted_block[lower, columns] * (1 - fraction) + sorted_block[upper, columns] * fraction
+    return np.where(n_valid > 0, values, np.nan)
+
+
+def _sorted_histogram(values, bins=HIST_BINS):
+    # np.histogram(values, bins) of an already sorted array, by binary search on the edges
+    lo, hi = values[0], values[-1]
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    edges = np.linspace(lo, hi, bins + 1)
+    starts = np.searchsorted(values, edges[:-1], side='left')
+    return np.diff(np.append(starts, len(values))), edges
+
+
+def _profile_numeric(df, numeric):
+    block = df[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+    missing = np.isnan(block)
+    nulls = missing.sum(axis=0)
+    n_valid = len(block) - nulls
+    # NaNs sort last, so each column's valid rows are a sorted prefix: min, max, quantiles,
+    # outlier counts and histograms are all read from it without another pass
+    sorted_block = np.sort(block, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.sum(block, axis=0, where=~missing) / n_valid
+        stds = np.sqrt(np.sum(np.square(block - means), axis=0, where=~missing) / (n_valid - 1))
+    # Sample std is undefined below two values (pandas gives NaN), the division above gives -0.0 or inf
+    stds[n_valid < 2] = np.nan
+    q1, median, q3 = (_sorted_quantiles(sorted_block, n_valid, q) for q in (0.25, 0.5, 0.75))
+    unique, top = _block_runs(sorted_block, n_valid)
+
+    profiles = {}
+    for i, col in enumerate(numeric):
+        dtype = df[col].dtype
+        values = sorted_block[:n_valid[i], i]
+        profile = {
+            'dtype': dtype,
+            'numeric': True,
+            'rows': len(block),
+            'nulls': int(nulls[i]),
+            'unique': int(unique[i]),
+            'min': None,
+            'max': None,
+            'mean': None if np.isnan(means[i]) else float(means[i]),
+            'std': None if np.isnan(stds[i]) else float(stds[i]),
+            'q1': None,
+            'median': None,
+            'q3': None,
+            'outliers': 0,
+            'top_values': {_restore(value, dtype): int(count) for value, count in zip(*top[i])},
+            'histogram': None,
+            'kde': None,
+        }
+        if len(values):
+            iqr = q3[i] - q1[i]
+            low = np.searchsorted(values, q1[i] - IQR_WHISKER * iqr, side='left')
+            high = np.searchsorted(values, q3[i] + IQR_WHISKER * iqr, side='right')
+            profile.update({
+                'min': _restore(values[0], dtype),
+                'max': _restore(values[-1], dtype),
+                'q1': float(q1[i]),
+                'median': float(median[i]),
+                'q3': float(q3[i]),
+                'outliers': int(low + len(values) - high),
+                'histogram': _sorted_histogram(values),
+            })
+            # Only columns the feature plot draws as a histogram get a KDE
+            if unique[i] >= 10:
+                profile['kde'] = binned_kde(values)
+        profile['mode'] = next(iter(profile['top_values']), None)
+        profiles[col] = profile
+    return profiles
+
+
+def _profile_other(data):
+    try:
+        # Sorted uniques put smaller values first among equally frequent ones
+        codes, uniques = pd.factorize(data, sort=True)
+    except TypeError:
+        codes, uniques = pd.factorize(data)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    top = np.argsort(-counts, kind='stable')[:TOP_VALUES]
+    top_values = {uniques[code]: int(counts[code]) for code in top}
+    return {
+        'dtype': data.dtype,
+        'numeric': False,
+        'rows': len(data),
+        'nulls': int((codes < 0).sum()),
+        'unique': len(uniques),
+        'min': None,
+        'max': None,
+        'mean': None,
+        'std': None,
+        'q1': None,
+        'median': None,
+        'q3': None,
+        'outliers': 0,
+        'top_values': top_values,
+        'histogram': None,
+        'kde': None,
+        'mode': next(iter(top_values), None),
+        # pandas describes datetimes by mean, min, quartiles and max; kept as computed at build time
+        'datetime_describe': data.describe() if pd.api.types.is_datetime64_any_dtype(data) else None,
+    }
+
+
+class DatasetProfile:
+    # Per-column statistics computed once per dataset: nulls, unique count, min/max, mean, std,
+    # quartiles, IQR outlier count, mode, the TOP_VALUES most frequent values and, for numeric
+    # columns, a HIST_BINS histogram and a KDE. Views read these instead of the raw data.
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self.summary = pd.DataFrame(
+            [{
+                'Feature': col,
+                'Type': profile['dtype'],
+                'Nulls': profile['nulls'],
+                'Unique': profile['unique'],
+                'Min': profile['min'],
+                'Max': profile['max'],
+                'Mean': profile['mean'],
+                'Mode': profile['mode'],
+            } for col, profile in columns.items()],
+            columns=SUMMARY_COLUMNS,
+        )
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __contains__(self, column):
+        return column in self.columns
+
+
+def build_profile(df):
+    # Numeric columns are handled together as one sorted float64 block, other columns are
+    # factorized once each
+    numeric = _numeric_columns(df)
+    stats = _profile_numeric(df, numeric) if numeric else {}
+    for col in df.columns:
+        if col not in stats:
+            stats[col] = _profile_other(df[col])
+    return DatasetProfile({col: stats[col] for col in df.columns}, len(df))
+
+
+def describe_column(profile, name=None):
+    # The rows DataFrame.describe() shows for the column, from its profile
+    count = profile['rows'] - profile['nulls']
+    if profile.get('datetime_describe') is not None:
+        return profile['datetime_describe'].rename(name)
+    if profile['numeric']:
+        values = {'count': float(count), 'mean': profile['mean'], 'std': profile['std'],
+                  'min': profile['min'], '25%': profile['q1'], '50%': profile['median'],
+                  '75%': profile['q3'], 'max': profile['max']}
+    else:
+        values = {'count': count, 'unique': profile['unique'], 'top': profile['mode'],
+                  'freq': profile['top_values'].get(profile['mode'])}
+    return pd.Series(values, name=name, dtype=object if not profile['numeric'] else np.float64)
+
+
+def format_stat(value, digits=2):
+    # Mean and std as the views print them, nan when the column has no values
+    return f"{value:.{digits}f}" if value is not None else "nan"
+
+
+def cached_profile(df, key=None):
+    # key=None profiles without caching
+    with _BUILD_LOCK:
+        if key is None:
+            return build_profile(df)
+        return PROFILE_CACHE.get_or_compute(key, lambda: build_profile(df))
+
+
+class ProfileWorker(QObject):
+    # Builds a dataset's profile off the GUI thread. Both signals carry the key, so a result
+    # that arrives after another dataset was loaded can be recognised and ignored.
+    finished = Signal(object, object)
+    error = Signal(object, str)
+
+    def __init__(self, df, key):
+        super().__init__()
+        self.df = df
+        self.key = key
+
+    def run(self):
+        try:
+            self.finished.emit(self.key, cached_profile(self.df, self.key))
+        except Exception as e:
+            self.error.emit(self.key, str(e))
@@ -1,12 +1,17 @@
 import sys
+import threading
 import pandas as pd
 from PySide6.QtWidgets import (
     QApplication, QWidget, QListWidget, QTextEdit, QVBoxLayout, QHBoxLayout, QLabel
 )
 from PySide6.QtCore import Qt
 
+from dataset_cache import DatasetCache
+from dataset_profile import ProfileWorker, cached_profile, format_stat
+
 # Load your DataFrame
-df = pd.read_csv("house_prices.csv")  # Replace with your dataset
+DATASET_PATH = "house_prices.csv"  # Replace with your dataset
+df = pd.read_csv(DATASET_PATH)
 
 class FeatureInspector(QWidget):
     def __init__(self):
@@ -22,6 +27,13 @@ class FeatureInspector(QWidget):
         # Populate feature list
         self.feature_list.addItems(df.columns)
 
+        # Column statistics computed once in the background, clicking a feature only reads them
+        self.dataset_key = (DatasetCache().content_hash(DATASET_PATH), len(df))
+        self.profile = None
+        self.profile_worker = ProfileWorker(df, self.dataset_key)
+        self.profile_worker.finished.connect(self.handle_profile_ready)
+        threading.Thread(target=self.profile_worker.run, daemon=True).start()
+
         # Connect signal
         self.feature_list.itemClicked.connect(self.display_feature_info)
 
@@ -31,29 +43,37 @@ class FeatureInspector(QWidget):
         layout.addWidget(self.feature_info, 5)
         self.setLayout(layout)
 
+    def handle_profile_ready(self, key, profile):
+        self.profile = profile
+
+    def dataset_profile(self):
+        # Waits for the background build when a feature is clicked before it is ready
+        if self.profile is None:
+            self.profile = cached_profile(df, self.dataset_key)
+        return self.profile
+
     def display_feature_info(self, item):
         col = item.text()
-        data = df[col]
+        data = self.dataset_profile()[col]
 
         info = f"<h3 style='color:#0078d7;'>{col}</h3>"
-        info += f"<b>Type:</b> {data.dtype}<br>"
-        info += f"<b>Missing:</b> {data.isnull().sum()}<br>"
-        info += f"<b>Unique:</b> {data.nunique()}<br>"
-
-        if pd.api.types.is_numeric_dtype(data):
-            info += f"<b>Min:</b> {data.min()}<br>"
-            info += f"<b>Max:</b> {data.max()}<br>"
-            info += f"<b>Mean:</b> {data.mean():.2f}<br>"
-            info += f"<b>Std Dev:</b> {data.std():.2f}<br>"
-            info += f"<b>Median:</b> {data.median()}<br>"
-
-        mode_val = data.mode()
-        if not mode_val.empty:
-            info += f"<b>Mode:</b> {mode_val[0]}<br>"
-
-        top_values = data.value_counts().head(5).to_dict()
+        info += f"<b>Type:</b> {data['dtype']}<br>"
+        info += f"<b>Missing:</b> {data['nulls']}<br>"
+        info += f"<b>Unique:</b> {data['unique']}<br>"
+
+        if data['numeric']:
+            info += f"<b>Min:</b> {data['min']}<br>"
+            info += f"<b>Max:</b> {data['max']}<br>"
+            info += f"<b>Mean:</b> {format_stat(data['mean'])}<br>"
+            info += f"<b>Std Dev:</b> {format_stat(data['std'])}<br>"
+            info += f"<b>Median:</b> {data['median']}<br>"
+
+        if data['mode'] is not None:
+            info += f"<b>Mode:</b> {data['mode']}<br>"
+
+        top_values = list(data['top_values'].items())[:5]
         info += "<br><b>Top 5 Values:</b><br>"
-        for val, count in top_values.items():
+        for val, count in top_values:
             info += f"{val}: {count}<br>"
 
         self.feature_info.setHtml(info)
@@ -0,0 +1,290 @@
+import os
+import json
+import math
+import shutil
+import hashlib
+import warnings
+import tempfile
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from caching import array_fingerprint
+from model_selection import subsample
+from training_engine import ARRAY_NAMES, LOWER_IS_BETTER, write_shared_arrays, read_shared_arrays
+
+# Default search ranges for the models in MODEL_PARAMS: ('int' | 'float' | 'log', low, high) or ('choice', [values])
+PARAM_SPACES = {
+    'logistic_regression': {
+        'C': ('log', 1e-3, 1e2),
+        'max_iter': ('int', 50, 1000)
+    },
+    'random_forest': {
+        'n_estimators': ('int', 10, 500),
+        'max_depth': ('int', 2, 50)
+    },
+    'neural_network': {
+        'epochs': ('int', 5, 100),
+        'batch_size': ('choice', [16, 32, 64, 128, 256])
+    },
+    'kmeans': {
+        'n_clusters': ('int', 2, 20),
+        'max_iter': ('int', 100, 500)
+    }
+}
+
+TRIAL_CACHE_PATH = os.environ.get('AUTODS_TRIAL_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'autods', 'trials.json'))
+# Trial scores kept in the cache file, the least recently used are dropped first
+TRIAL_CACHE_MAX_ENTRIES = int(os.environ.get('AUTODS_TRIAL_CACHE_MAX_ENTRIES', 10_000))
+SCREEN_ARRAYS = ['X_train_screen', 'X_test', 'y_train_screen', 'y_test']
+
+
+def parse_param_input(text, param_type):
+    # "low:high" is a search range, "a,b,c" a list of choices, anything else a single value
+    text = text.strip()
+    if ':' in text:
+        low, high = (param_type(part) for part in text.split(':', 1))
+        return ('int', low, high) if param_type is int else ('float', low, high)
+    if ',' in text:
+        return ('choice', [param_type(part) for part in text.split(',') if part.strip()])
+    return param_type(text)
+
+
+def sweep_values(spec, max_steps=10):
+    # Values to step through for a parsed 'low:high' range or 'a,b,c' choice list
+    if spec[0] == 'choice':
+        return sorted(spec[1])
+    return sorted(set(int(round(value)) for value in np.linspace(spec[1], spec[2], max_steps)))
+
+
+class ParamSpace:
+    def __init__(self, ranges):
+        self.ranges = ranges
+
+    def sample(self, rng):
+        params = {}
+        for name, spec in self.ranges.items():
+            kind = spec[0]
+            if kind == 'choice':
+                params[name] = spec[1][rng.integers(len(spec[1]))]
+            elif kind == 'int':
+                params[name] = int(rng.integers(spec[1], spec[2] + 1))
+            elif kind == 'log':
+                params[name] = float(math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2]))))
+            else:
+                params[name] = float(rng.uniform(spec[1], spec[2]))
+        return params
+
+    def encode(self, params):
+        # Every dimension mapped to [0, 1] for the Gaussian process
+        point = []
+        for name, spec in self.ranges.items():
+            value = params[name]
+            kind = spec[0]
+            if kind == 'choice':
+                point.append(spec[1].index(value) / max(len(spec[1]) - 1, 1))
+            elif kind == 'log':
+                point.append((math.log(value) - math.log(spec[1])) / (math.log(spec[2]) - math.log(spec[1]) or 1))
+            else:
+                point.append((value - spec[1]) / ((spec[2] - spec[1]) or 1))
+        return point
+
+
+class TrialCache:
+    # Scores of finished trials on disk, keyed by data fingerprint, model and parameters.
+    # put only updates memory, flush writes the file once per search.
+    def __init__(self, path=TRIAL_CACHE_PATH, max_entries=TRIAL_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path) as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.blake2b(json.dumps(parts, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                # Dicts keep insertion order, so the end holds the most recently used entries
+                self._entries[key] = value
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._dirty = True
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _run_trial(problem_type, model_name, params, array_dir, names):
+    from custom_training import train_custom_model
+
+    arrays = read_shared_arrays(array_dir, names)
+    metrics = train_custom_model(problem_type, model_name, params, *arrays)
+    metric, score = next(iter(metrics.items()))
+    return metric, float(score)
+
+
+class HyperparameterSearch:
+    def __init__(self, problem_type, model_name, param_ranges=None, n_trials=20, method='random', n_jobs=None,
+                 screen_fraction=0.25, min_screened=4, cache=None, random_state=42):
+        # param_ranges: overrides for PARAM_SPACES[model_name]; fixed values are passed to every trial as is
+        # method: 'random' or 'bayesian' (Gaussian process with expected improvement)
+        # screen_fraction: every trial is first trained on this share of the training rows, and once
+        #   min_screened trials have been screened, trials below the median screen score are stopped there
+        self.problem_type = problem_type
+        self.model_name = model_name
+        ranges = dict(PARAM_SPACES.get(model_name, {}))
+        ranges.update(param_ranges or {})
+        self.fixed = {name: value for name, value in ranges.items() if not isinstance(value, tuple)}
+        self.space = ParamSpace({name: spec for name, spec in ranges.items() if isinstance(spec, tuple)})
+        self.n_trials = n_trials
+        self.method = method
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.screen_fraction = screen_fraction
+        self.min_screened = min_screened
+        self.cache = cache if cache is not None else TrialCache()
+        self.rng = np.random.default_rng(random_state)
+        self.random_state = random_state
+        self.trials = []
+        self.metric = None
+
+    def _better(self, a, b):
+        return a < b if self.problem_type in LOWER_IS_BETTER else a > b
+
+    def _objective(self, score):
+        # Higher is better for the optimiser
+        return -score if self.problem_type in LOWER_IS_BETTER else score
+
+    def _propose(self):
+        complete = [trial for trial in self.trials if trial['status'] in ('complete', 'cached')]
+        if self.method != 'bayesian' or len(complete) < max(3, self.min_screened) or not self.space.ranges:
+            return {**self.fixed, **self.space.sample(self.rng)}
+
+        from scipy.stats import norm
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.gaussian_process.kernels import Matern
+        from sklearn.exceptions import ConvergenceWarning
+
+        X = np.array([self.space.encode(trial['params']) for trial in complete])
+        y = np.array([self._objective(trial['score']) for trial in complete])
+        with warnings.catch_warnings():
+            # Few, noisy trials routinely push the kernel length scale to its bounds
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            gp = GaussianProcessRegressor(Matern(nu=2.5), normalize_y=True, random_state=self.random_state).fit(X, y)
+        candidates = [self.space.sample(self.rng) for _ in range(256)]
+        mean, std = gp.predict(np.array([self.space.encode(params) for params in candidates]), return_std=True)
+        std = np.maximum(std, 1e-9)
+        improvement = mean - y.max() - 0.01
+        expected_improvement = improvement * norm.cdf(improvement / std) + std * norm.pdf(improvement / std)
+        return {**self.fixed, **candidates[int(np.argmax(expected_improvement))]}
+
+    def _screen_median(self):
+        scores = [trial['screen_score'] for trial in self.trials if trial.get('screen_score') is not None]
+        if len(scores) < self.min_screened:
+            return None
+        return float(np.median(scores))
+
+    def run(self, X_train, X_test, y_train, y_test):
+        arrays = [np.asarray(array) for array in (X_train, X_test, y_train, y_test)]
+        fingerprint = array_fingerprint(*arrays)
+        screen_rows = int(len(arrays[0]) * self.screen_fraction)
+        screening = self.screen_fraction < 1 and screen_rows > 0
+        X_screen, y_screen = subsample(arrays[0], arrays[2], screen_rows, self.problem_type, self.random_state) if screening else (None, None)
+
+        array_dir = tempfile.mkdtemp(prefix='autods_search_')
+        shared = dict(zip(ARRAY_NAMES, arrays))
+        if screening:
+            shared.update(X_train_screen=X_screen, y_train_screen=y_screen)
+        write_shared_arrays(array_dir, shared)
+
+        self.trials = []
+        pending = {}
+        proposed = 0
+        pool = ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=mp.get_context('spawn'))
+
+        def submit(trial, phase):
+            key = TrialCache.key(fingerprint, self.problem_type, self.model_name, trial['params'], phase, self.screen_fraction)
+            cached = self.cache.get(key)
+            if cached is not None:
+                # Same configuration on the same data: reuse the score instead of training again
+                finish(trial, phase, cached['metric'], cached['score'], from_cache=True)
+                return
+            names = SCREEN_ARRAYS if phase == 'screen' else ARRAY_NAMES
+            future = pool.submit(_run_trial, self.problem_type, self.model_name, trial['params'], array_dir, names)
+            pending[future] = (trial, phase, key)
+
+        def finish(trial, phase, metric, score, from_cache=False):
+            self.metric = metric
+            if phase == 'screen':
+                median = self._screen_median()
+                trial['screen_score'] = score
+                if median is not None and self._better(median, score):
+                    trial['status'] = 'pruned'
+                    return
+                submit(trial, 'full')
+            else:
+                trial['score'] = score
+                trial['status'] = 'cached' if from_cache else 'complete'
+
+        try:
+            while proposed < self.n_trials or pending:
+                while proposed < self.n_trials and len(pending) < self.n_jobs:
+                    trial = {'params': self._propose(), 'status': 'running', 'screen_score': None, 'score': None}
+                    self.trials.append(trial)
+                    proposed += 1
+                    submit(trial, 'screen' if screening else 'full')
+                if not pending:
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    trial, phase, key = pending.pop(future)
+                    try:
+                        metric, score = future.result()
+                    except Exception as e:
+                        trial['status'] = 'failed'
+                        trial['error'] = str(e)
+                        continue
+                    self.cache.put(key, {'metric': metric, 'score': score})
+                    finish(trial, phase, metric, score)
+        finally:
+            pool.shutdown(cancel_futures=True)
+            shutil.rmtree(array_dir, ignore_errors=True)
+            self.cache.flush()
+
+        finished = [trial for trial in self.trials if trial['score'] is not None]
+        best = None
+        for trial in finished:
+            if best is None or self._better(trial['score'], best['score']):
+                best = trial
+        return {
+            'metric': self.metric,
+            'best_params': best['params'] if best else None,
+            'best_score': best['score'] if best else None,
+            'trials': self.trials,
+        }
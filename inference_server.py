@@ -0,0 +1,274 @@
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from model_registry import ModelRegistry, REGISTRY_DIR
+from training_engine import LOWER_IS_BETTER
+
+MAX_BATCH_ROWS = 1024
+MAX_WAIT_MS = 5
+LATENCY_WINDOW = 10_000
+
+
+class PendingRequest:
+    def __init__(self, rows):
+        self.rows = rows
+        self.done = threading.Event()
+        self.predictions = None
+        self.error = None
+
+
+class MicroBatcher:
+    # Requests arriving within max_wait_ms of each other are concatenated and sent through
+    # predict_rows in one call, up to max_batch_rows rows per call
+    def __init__(self, predict_rows, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.predict_rows = predict_rows
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.batched_rows = 0
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        request = PendingRequest(rows)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.predictions
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        n_rows = len(batch[0].rows)
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            n_rows += len(request.rows)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                predictions = self.predict_rows(pd.concat([request.rows for request in batch], ignore_index=True))
+                offset = 0
+                for request in batch:
+                    request.predictions = predictions[offset:offset + len(request.rows)]
+                    offset += len(request.rows)
+            except Exception as e:
+                # A bad request fails every request it was batched with, so retry them one by one
+                if len(batch) == 1:
+                    batch[0].error = e
+                else:
+                    for request in batch:
+                        try:
+                            request.predictions = self.predict_rows(request.rows)
+                        except Exception as request_error:
+                            request.error = request_error
+            self.batches += 1
+            self.batched_rows += sum(len(request.rows) for request in batch)
+            for request in batch:
+                request.done.set()
+
+
+class LatencyStats:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, latency_s, rows, error=False):
+        with self._lock:
+            self.latencies.append(latency_s)
+            self.requests += 1
+            self.rows += rows
+            self.errors += error
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self.latencies)
+            requests, rows, errors = self.requests, self.rows, self.errors
+        uptime = time.time() - self.started
+        return {
+            'requests': requests,
+            'rows': rows,
+            'errors': errors,
+            'uptime_s': uptime,
+            'requests_per_s': requests / uptime if uptime else None,
+            'rows_per_s': rows / uptime if uptime else None,
+            'p50_ms': float(np.percentile(latencies, 50) * 1000) if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99) * 1000) if len(latencies) else None,
+        }
+
+
+class InferenceService:
+    # One registry version loaded once and kept in memory; model_name=None serves the best scoring model
+    def __init__(self, registry_dir=REGISTRY_DIR, version=None, model_name=None,
+                 max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.registry = ModelRegistry(registry_dir)
+        models, self.preprocessor, self.manifest = self.registry.load(version)
+        self.problem_type = self.manifest['problem_type']
+        self.model_name = model_name or self._best_model(models)
+        self.model = models[self.model_name]
+        self.features = self.manifest['features']
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(self.predict_rows, max_batch_rows, max_wait_ms)
+
+    def _best_model(self, models):
+        scored = [name for name in self.manifest['metrics'] if name in models]
+        if not scored:
+            return next(iter(models))
+        return sorted(scored, key=self.manifest['metrics'].get, reverse=self.problem_type not in LOWER_IS_BETTER)[0]
+
+    def predict_rows(self, rows):
+        if self.preprocessor is not None:
+            X = self.preprocessor.transform(rows[self.features])[self.features]
+        else:
+            X = rows[self.features]
+        if 'neural_network' in self.model_name:
+            from neural_training import predict_network
+            predictions = predict_network(self.problem_type, self.model, X)
+        else:
+            # ParallelTrainer fits on plain arrays, so the models know no feature names
+            predictions = self.model.predict(X.to_numpy())
+        if self.preprocessor is not None and self.problem_type in ('classification', 'regression'):
+            predictions = self.preprocessor.inverse_transform_target(predictions)
+        return predictions
+
+    def predict(self, rows):
+        missing = [col for col in self.features if col not in rows.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        start = time.perf_counter()
+        try:
+            predictions = self.batcher.submit(rows)
+        except Exception:
+            self.stats.record(time.perf_counter() - start, len(rows), error=True)
+            raise
+        self.stats.record(time.perf_counter() - start, len(rows))
+        return predictions
+
+    def info(self):
+        return {
+            'version': self.manifest['version'],
+            'model': self.model_name,
+            'problem_type': self.problem_type,
+            'target': self.manifest['target'],
+            'features': self.features,
+            'metrics': self.manifest['metrics'],
+            'dataset_path': self.manifest['dataset_path'],
+        }
+
+    def metrics(self):
+        return {
+            **self.stats.snapshot(),
+            'batches': self.batcher.batches,
+            'mean_batch_rows': self.batcher.batched_rows / self.batcher.batches if self.batcher.batches else None,
+        }
+
+
+def parse_rows(payload):
+    # {"rows": [{column: value, ...}, ...]} or {"columns": [...], "data": [[...], ...]}
+    if 'rows' in payload:
+        return pd.DataFrame.from_records(payload['rows'])
+    return pd.DataFrame(payload['data'], columns=payload['columns'])
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            elif self.path == '/model':
+                self._send(200, service.info())
+            elif self.path == '/metrics':
+                self._send(200, service.metrics())
+            else:
+                self._send(404, {'error': f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': f"Unknown path {self.path}"})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                rows = parse_rows(payload)
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, {'error': f"Invalid request: {e}"})
+                return
+            try:
+                predictions = service.predict(rows)
+            except Exception as e:
+                self._send(422, {'error': str(e)})
+                return
+            self._send(200, {'predictions': np.asarray(predictions).tolist(), 'version': service.manifest['version'], 'model': service.model_name})
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the latency under load
+            pass
+
+    return Handler
+
+
+class InferenceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 makes concurrent clients wait on connection retries
+    request_queue_size = 128
+
+
+def serve(service, host='127.0.0.1', port=8765):
+    return InferenceHTTPServer((host, port), make_handler(service))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a saved model version over HTTP on localhost")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR)
+    parser.add_argument('--version', help="defaults to the newest version")
+    parser.add_argument('--model', help="defaults to the best scoring model of the version")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch-rows', type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    service = InferenceService(args.registry_dir, args.version, args.model, args.max_batch_rows, args.max_wait_ms)
+    server = serve(service, args.host, args.port)
+    print(f"Serving {service.model_name} from version {service.manifest['version']} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import os
+import sys
+import json
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger('autods.instrumentation')
+
+# Records kept in memory, the oldest are dropped first; hooks still see every record
+MAX_RECORDS = int(os.environ.get('AUTODS_MAX_RECORDS', 10_000))
+# How often the resident set size is sampled while a stage runs
+RSS_SAMPLE_SECONDS = float(os.environ.get('AUTODS_RSS_SAMPLE_SECONDS', 0.05))
+
+
+def current_rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    # High-water mark of the process resident set size over the whole process lifetime so far,
+    # not of any one stage: it only rises, and stays at an earlier stage's peak
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss) / 1024 ** 2
+    except ImportError:
+        return None
+
+
+class RssSampler:
+    # Highest resident set size seen while the block runs, sampled on a thread. Allocations
+    # freed between two samples are missed, so it is a lower bound of the block's true peak.
+    # Work on other threads of the process during the block is included.
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+        return False
+
+
+def logging_hook(log=logger, level=logging.INFO):
+    # After-hook that writes every record as one JSON log line
+    def after(record):
+        log.log(level, json.dumps(record, default=str))
+    return after
+
+
+class Instrumentation:
+    def __init__(self, profile_stage=None, profiler='cprofile', profile_dir='profiles'):
+        # profile_stage: name of one stage to run under cProfile ('cprofile') or tracemalloc ('tracemalloc')
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.before_hooks = []
+        self.after_hooks = []
+        self.records = deque(maxlen=MAX_RECORDS)
+        self._lock = threading.Lock()
+
+    def add_hook(self, before=None, after=None):
+        # before(name, category, fields) runs when a stage starts, after(record) when it ends
+        if before is not None:
+            self.before_hooks.append(before)
+        if after is not None:
+            self.after_hooks.append(after)
+
+    def notify_before(self, name, category='stage', **fields):
+        for hook in self.before_hooks:
+            hook(name, category, fields)
+
+    def record(self, name, category, start, wall_s, cpu_s=None, peak_rss=None, rows=None, pid=None, thread=None,
+               process_peak_rss=None, **fields):
+        # Also used for work timed elsewhere, such as model fits in worker processes.
+        # peak_rss: highest RSS sampled while the work ran, process_peak_rss: peak_rss_mb() when it ended
+        record = {
+            'name': name,
+            'category': category,
+            'start': start,
+            'wall_s': wall_s,
+            'cpu_s': cpu_s,
+            'peak_rss_mb': peak_rss,
+            'process_peak_rss_mb': process_peak_rss,
+            'rows': rows,
+            'rows_per_s': rows / wall_s if rows and wall_s else None,
+            'pid': pid or os.getpid(),
+            'thread': thread or threading.get_ident(),
+            **fields,
+        }
+        with self._lock:
+            self.records.append(record)
+        for hook in self.after_hooks:
+            hook(record)
+        return record
+
+    @contextmanager
+    def stage(self, name, category='stage', rows=None, **fields):
+        self.notify_before(name, category, rows=rows, **fields)
+        profiling = name == self.profile_stage
+        if profiling:
+            profile = self._start_profile()
+        start = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        sampler = RssSampler()
+        try:
+            with sampler:
+                yield fields
+        finally:
+            wall_s = time.perf_counter() - wall_start
+            cpu_s = time.process_time() - cpu_start
+            if profiling:
+                fields['profile'] = self._stop_profile(name, profile)
+            # The body may fill in the row count once it is known
+            rows = fields.pop('rows', rows)
+            self.record(name, category, start, wall_s, cpu_s, sampler.peak, rows,
+                        process_peak_rss=peak_rss_mb(), **fields)
+
+    def _start_profile(self):
+        if self.profiler == 'tracemalloc':
+            tracemalloc.start()
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _stop_profile(self, name, profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if self.profiler == 'tracemalloc':
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            path = os.path.join(self.profile_dir, f'{name}.tracemalloc.txt')
+            with open(path, 'w') as f:
+                f.write(f"peak traced memory: {peak / 1024 ** 2:.2f} MB\n")
+                for stat in snapshot.statistics('lineno')[:50]:
+                    f.write(f"{stat}\n")
+            return path
+        profile.disable()
+        path = os.path.join(self.profile_dir, f'{name}.prof')
+        profile.dump_stats(path)
+        return path
+
+    def write_jsonl(self, path):
+        with open(path, 'w') as f:
+            for record in self.records:
+                f.write(json.dumps(record, default=str) + '\n')
+
+    def write_chrome_trace(self, path):
+        # Complete ('X') events in the Trace Event Format, open in chrome://tracing or Perfetto
+        events = []
+        for record in self.records:
+            args = {key: value for key, value in record.items() if key not in ('name', 'category', 'start', 'pid', 'thread')}
+            events.append({
+                'name': record['name'],
+                'cat': record['category'],
+                'ph': 'X',
+                'ts': record['start'] * 1e6,
+                'dur': record['wall_s'] * 1e6,
+                'pid': record['pid'],
+                'tid': record['thread'],
+                'args': args,
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+
+def print_profile(path, limit=25):
+    pstats.Stats(path).sort_stats('cumulative').print_stats(limit)
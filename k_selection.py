@@ -0,0 +1,138 @@
+import os
+import time
+import shutil
+import threading
+import tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+from clustering_metrics import estimate_silhouette
+from instrumentation import RssSampler, peak_rss_mb
+from training_engine import PARALLEL_MIN_CELLS, write_shared_arrays, read_shared_arrays
+
+K_VALUES = range(2, 11)
+# Above this many rows every k is fitted with MiniBatchKMeans
+MINIBATCH_MIN_ROWS = 100_000
+MINIBATCH_SIZE = 4096
+
+
+def make_kmeans(k, minibatch, random_state=42):
+    if minibatch:
+        return MiniBatchKMeans(n_clusters=k, batch_size=MINIBATCH_SIZE, n_init=3, random_state=random_state)
+    return KMeans(n_clusters=k, n_init=3, random_state=random_state)
+
+
+def fit_k(k, X, minibatch, criterion, random_state=42):
+    model = make_kmeans(k, minibatch, random_state)
+    labels = model.fit_predict(X)
+    # Sampled above the exact-silhouette row limit, so every k costs the same to score
+    silhouette = estimate_silhouette(X, labels, random_state=random_state)[0] if criterion == 'silhouette' else None
+    return {'k': k, 'inertia': float(model.inertia_), 'silhouette': silhouette}, model
+
+
+def _timed_fit_k(k, X, minibatch, criterion, random_state):
+    # Same stats as training_engine's model fits, so the k sweep shows up in the instrumentation
+    stats = {'start': time.time(), 'pid': os.getpid(), 'thread': threading.get_ident(), 'rows': len(X)}
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with RssSampler() as sampler:
+        point, model = fit_k(k, X, minibatch, criterion, random_state)
+    stats['wall_s'] = time.perf_counter() - wall_start
+    stats['cpu_s'] = time.process_time() - cpu_start
+    stats['peak_rss'] = sampler.peak
+    return point, model, stats
+
+
+def _fit_k_in_worker(k, array_dir, minibatch, criterion, random_state):
+    X, = read_shared_arrays(array_dir, ['X'])
+    point, model, stats = _timed_fit_k(k, X, minibatch, criterion, random_state)
+    stats['process_peak_rss'] = peak_rss_mb()
+    return point, model, stats
+
+
+def elbow_k(curve):
+    # Point of the inertia curve furthest from the straight line between its ends, after
+    # scaling both axes to [0, 1]
+    ks = np.array([point['k'] for point in curve], dtype=np.float64)
+    inertia = np.array([point['inertia'] for point in curve])
+    if len(curve) < 3:
+        return int(ks[0])
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    y = (inertia - inertia[-1]) / ((inertia[0] - inertia[-1]) or 1)
+    return int(ks[np.argmax(1 - x - y)])
+
+
+class KSelector:
+    # Fits KMeans for every k in k_values (in a process pool on large data) and picks k by the elbow of the
+    # inertia curve or by the best (sampled) silhouette
+    def __init__(self, k_values=K_VALUES, criterion='elbow', n_jobs=None, minibatch=None, random_state=42,
+                 on_start=None, on_finish=None):
+        # minibatch: None uses MiniBatchKMeans once the data has MINIBATCH_MIN_ROWS rows
+        # n_jobs: worker processes (None = one per CPU); below PARALLEL_MIN_CELLS every k is fitted inline
+        # on_start(name) / on_finish(name, stats): as in training_engine.ParallelTrainer, called in this
+        #   process for every k with name 'kmeans_k<k>'; in the pool on_start is called when the k is submitted
+        self.k_values = list(k_values)
+        self.criterion = criterion
+        self.n_jobs = n_jobs
+        self.minibatch = minibatch
+        self.random_state = random_state
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.curve = []
+        self.k = None
+
+    def _started(self, k):
+        if self.on_start is not None:
+            self.on_start(f'kmeans_k{k}')
+
+    def _finished(self, k, stats):
+        if self.on_finish is not None:
+            self.on_finish(f'kmeans_k{k}', stats)
+
+    def select(self, X):
+        # Returns (fitted model for the chosen k, curve); the curve has k, inertia and silhouette per k
+        # One C-contiguous float32 copy: KMeans works on it without converting, and the workers
+        # memory-map the same file instead of each receiving a pickled copy
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        k_values = [k for k in self.k_values if k < len(X)]
+        if not k_values:
+            raise ValueError(f"Cannot select k for {len(X)} rows, every k in {self.k_values} needs more rows than clusters")
+        minibatch = self.minibatch if self.minibatch is not None else len(X) >= MINIBATCH_MIN_ROWS
+        n_workers = max(1, min(self.n_jobs or os.cpu_count() or 1, len(k_values)))
+        # Starting a spawn pool costs seconds, far more than fitting every k on small data
+        if X.size < PARALLEL_MIN_CELLS:
+            n_workers = 1
+
+        models = {}
+        self.curve = []
+        if n_workers == 1:
+            for k in k_values:
+                self._started(k)
+                point, models[k], stats = _timed_fit_k(k, X, minibatch, self.criterion, self.random_state)
+                self.curve.append(point)
+                self._finished(k, stats)
+        else:
+            array_dir = tempfile.mkdtemp(prefix='autods_kselect_')
+            try:
+                write_shared_arrays(array_dir, {'X': X})
+                with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context('spawn')) as pool:
+                    futures = []
+                    for k in k_values:
+                        self._started(k)
+                        futures.append(pool.submit(_fit_k_in_worker, k, array_dir, minibatch, self.criterion, self.random_state))
+                    for future in futures:
+                        point, model, stats = future.result()
+                        models[point['k']] = model
+                        self.curve.append(point)
+                        self._finished(point['k'], stats)
+            finally:
+                shutil.rmtree(array_dir, ignore_errors=True)
+
+        if self.criterion == 'silhouette':
+            self.k = max(self.curve, key=lambda point: point['silhouette'])['k']
+        else:
+            self.k = elbow_k(self.curve)
+        return models[self.k], self.curve
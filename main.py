@@ -1,8 +1,8 @@
 from dashboard import Ui_AutoDs_Intelligent
 import sys,os
-from PySide6.QtWidgets import (QWidget,QHBoxLayout, QApplication, QMainWindow, QPushButton, QTableWidgetItem)
+from PySide6.QtWidgets import (QWidget,QHBoxLayout, QApplication, QMainWindow, QPushButton)
 from PySide6.QtWidgets import (QApplication, QMainWindow, QPushButton,QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QMessageBox)
-from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QPushButton, QSizePolicy, QMessageBox,QScrollArea,QTableWidget,QComboBox
+from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QPushButton, QSizePolicy, QMessageBox,QScrollArea,QTableView,QComboBox
 from PySide6.QtSvgWidgets import QSvgWidget
 from PySide6.QtWidgets import QLineEdit
 from PySide6.QtGui import QDragEnterEvent, QDropEvent
@@ -13,14 +13,19 @@ from PySide6.QtCore import Qt
 import pandas as pd
 import os
 from PySide6.QtGui import QPixmap
-import seaborn as sns
+import time
 import threading
-import matplotlib.pyplot as plt
 os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 
 from PySide6.QtCore import QObject, Signal, Slot
-from sklearn.model_selection import train_test_split
-from custom_training import train_custom_model
+from dataset_cache import DatasetCache
+from dataset_loading import DatasetLoader
+from dataset_profile import ProfileWorker, cached_profile, format_stat
+from table_model import DataFrameModel, DataPreviewDialog, replace_table_widget
+from plot_rendering import PLOT_CACHE, PlotRenderer, plot_key, render_feature_plot, render_chart
+from streaming_training import should_stream
+from hyperparameter_search import HyperparameterSearch, parse_param_input, sweep_values
+from instrumentation import logging_hook
 
 MODEL_PARAMS = {
     'classification': {
@@ -93,12 +98,13 @@ DEFAULT_MODEL_PARAMS = {
 
 class Worker(QObject):
     finished = Signal(dict, dict)
-    # output = Signal(dict,dict,dict,dict)
+    output = Signal(object, object, object, object)
     error = Signal(str)
 
-    def __init__(self, df_processed, feature_cols, target_col, problem_type, pipeliner):
+    def __init__(self, df, feature_cols, target_col, problem_type, pipeliner, dataset_path=None):
         super().__init__()
-        self.df_processed = df_processed
+        self.df = df
+        self.dataset_path = dataset_path
         self.feature_cols = feature_cols
         self.target_col = target_col
         self.problem_type = problem_type
@@ -106,12 +112,30 @@ class Worker(QObject):
 
     def run(self):
         try:
-            X = self.df_processed[self.feature_cols]
-            y = self.df_processed[self.target_col]
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            trained_models, results = self.pipeliner.train_models(self.problem_type, X_train, X_test, y_train, y_test)
+            if self.dataset_path is not None and should_stream(self.dataset_path):
+                # Too large for memory, train from disk chunk by chunk
+                trained_models, results = self.pipeliner.train_streaming(self.problem_type, self.dataset_path, self.feature_cols, self.target_col)
+            else:
+                X_train, X_test, y_train, y_test = self.pipeliner.split_and_preprocess(self.df, self.feature_cols, self.target_col)
+                self.output.emit(X_train, X_test, y_train, y_test)
+                trained_models, results = self.pipeliner.train_models(self.problem_type, X_train, X_test, y_train, y_test)
             self.finished.emit(trained_models, results)
-            # self.output.emit(X_train, X_test, y_train, y_test)
+        except Exception as e:
+            self.error.emit(str(e))
+
+class SearchWorker(QObject):
+    finished = Signal(object)
+    error = Signal(str)
+
+    def __init__(self, search, *args):
+        # search: callable run on the worker thread with args, its result is emitted with finished
+        super().__init__()
+        self.search = search
+        self.args = args
+
+    def run(self):
+        try:
+            self.finished.emit(self.search(*self.args))
         except Exception as e:
             self.error.emit(str(e))
 
@@ -134,10 +158,32 @@ class MainWindow(QMainWindow):
         self.ui.model_training_button.clicked.connect(self.model_training_page)
         self.ui.load_data_button.clicked.connect(self.upload_dataset_page)
         self.training_results = None
+        self.summary_view = replace_table_widget(self.ui.tableWidget)
+        self.plot_renderer = PlotRenderer(parent=self)
+        self.plot_renderer.rendered.connect(self.show_rendered_plot)
+        self.plot_renderer.failed.connect(self.show_plot_error)
+        self.preview_button = QPushButton("Preview Data")
+        self.preview_button.setMinimumSize(110, 30)
+        self.preview_button.clicked.connect(self.preview_data)
+        # The page's designer widgets are placed absolutely; this layout only holds the button,
+        # keeping it in the top right corner at any page width
+        preview_layout = QHBoxLayout(self.ui.dataset_information_page)
+        preview_layout.setContentsMargins(0, 5, 10, 0)
+        preview_layout.addStretch()
+        preview_layout.addWidget(self.preview_button, alignment=Qt.AlignTop)
         from pipeline import AutoMLPipeline
-        self.pipeliner = AutoMLPipeline()
+        self.pipeliner = AutoMLPipeline(k_selection='elbow')
+        # Stage records, and the plot cache stats on close, go to the 'autods.instrumentation' logger
+        self.pipeliner.instrumentation.add_hook(after=logging_hook())
+        # spaCy loads in the background while the user picks a dataset
+        self.pipeliner.preload_nlp()
         # self.df = pd.read_csv("house_prices.csv")
 
+    def closeEvent(self, event):
+        self.plot_renderer.shutdown()
+        self.pipeliner.instrumentation.record('plot_cache', 'cache', time.time(), 0.0, **PLOT_CACHE.stats())
+        super().closeEvent(event)
+
     def main_page(self):
         self.ui.stackedWidget.setCurrentWidget(self.ui.main_page)
         self.ui.data_info_button.setChecked(True)
@@ -167,13 +213,57 @@ class MainWindow(QMainWindow):
         for file in files:
             self.ui.label_7.setVisible(True)
             self.filename = file.split("/")[-1]
-            self.ui.label_7.setText(f"Dataset Load with file name : {self.filename}")
-            # file read
-            self.df = pd.read_csv(f"{file}")
-            # problem statement analysis
-            self.ui.load_data.clicked.connect(self.load_data_in_pipeline)
-            self.ui.label_8.setVisible(True)
-            self.ui.label_8.setText("Analysing Problem Statement...")
+            self.dataset_path = file
+            self.ui.label_7.setText(f"Loading {self.filename}...")
+            # file read in the background, chunk by chunk
+            self.loader = DatasetLoader(file)
+            self.loader.progress.connect(self.handle_load_progress)
+            self.loader.finished.connect(self.handle_dataset_loaded)
+            self.loader.error.connect(self.handle_load_error)
+            threading.Thread(target=self.loader.run, daemon=True).start()
+
+    @Slot(int)
+    def handle_load_progress(self, percent):
+        self.ui.label_7.setText(f"Loading {self.filename}... {percent}%")
+
+    @Slot(object)
+    def handle_dataset_loaded(self, df):
+        self.df = df
+        # Identifies this dataset for the profile cache, a preview of a large file differs from the full load
+        self.dataset_key = (DatasetCache().content_hash(self.dataset_path), len(df))
+        # Column statistics for every view are built once, in the background
+        self.profile = None
+        self.profile_worker = ProfileWorker(df, self.dataset_key)
+        self.profile_worker.finished.connect(self.handle_profile_ready)
+        self.profile_worker.error.connect(self.handle_profile_error)
+        threading.Thread(target=self.profile_worker.run, daemon=True).start()
+        self.ui.label_7.setText(f"Dataset Load with file name : {self.filename}")
+        # problem statement analysis
+        self.ui.load_data.clicked.connect(self.load_data_in_pipeline)
+        self.ui.label_8.setVisible(True)
+        self.ui.label_8.setText("Analysing Problem Statement...")
+
+    @Slot(object, object)
+    def handle_profile_ready(self, key, profile):
+        # A profile started for a previously loaded dataset arrives too late to be used
+        if key == self.dataset_key:
+            self.profile = profile
+
+    @Slot(object, str)
+    def handle_profile_error(self, key, error_msg):
+        if key == self.dataset_key:
+            QMessageBox.warning(self, "Profile Error", f"Could not compute column statistics: {error_msg}")
+
+    def dataset_profile(self):
+        # Waits for the background build when a view needs the profile before it is ready
+        if self.profile is None:
+            self.profile = cached_profile(self.df, self.dataset_key)
+        return self.profile
+
+    @Slot(str)
+    def handle_load_error(self, error_msg):
+        self.ui.label_7.setText(f"Could not load {self.filename}")
+        QMessageBox.critical(self, "Load Error", error_msg)
    
     def load_data_in_pipeline(self):
         self.ui.listWidget.clear()
@@ -183,29 +273,37 @@ class MainWindow(QMainWindow):
         self.ui.comboBox.clear()
         self.promt = self.ui.promt_input.text()
         self.problem_type = self.pipeliner.analyze_problem_statement(self.promt)
+        # identify_features and the preprocessor read the problem type from the pipeline
+        self.pipeliner.problem_type = self.problem_type
         self.ui.label_8.setText(f"Problem Statement Type is {self.problem_type}")
         self.ui.label_9.setVisible(True)
         self.target_col, self.feature_cols = self.pipeliner.identify_features(self.df, self.promt)
         self.ui.label_9.setText(f"Identified Fearures: {self.target_col} is target column")
         self.ui.label_10.setVisible(True)
-        self.df_processed = self.pipeliner.preprocess_data(self.df)
         self.ui.goto_dashboard.setVisible(True)
 
-        # Start thread
-        self.worker = Worker(self.df_processed, self.feature_cols, self.target_col, self.problem_type, self.pipeliner)
+        # Out-of-core training keeps no in-memory split, so custom training and the parameter
+        # search have nothing to train on for a streamed dataset
+        self.X_train = self.X_test = self.y_train = self.y_test = None
+        streamed = self.dataset_path is not None and should_stream(self.dataset_path)
+        self.ui.generate_button_2.setEnabled(not streamed)
+        self.ui.generate_button_2.setToolTip("Not available for datasets trained out-of-core" if streamed else "")
+
+        # Start thread, preprocessing is fitted there on the training rows only
+        self.worker = Worker(self.df, self.feature_cols, self.target_col, self.problem_type, self.pipeliner, self.dataset_path)
         self.worker.finished.connect(self.handle_training_results)
         self.worker.error.connect(self.handle_thread_error)
-        # self.worker.output.connect(self.train_test_param)
+        self.worker.output.connect(self.train_test_param)
 
         thread = threading.Thread(target=self.worker.run)
         thread.start()
 
-    # @Slot(dict)
-    # def train_test_param(self,X_train, X_test, y_train, y_test):
-    #     self.X_train = X_train
-    #     self.X_test = X_test
-    #     self.y_train = y_train
-    #     self.y_test = y_test
+    @Slot(object, object, object, object)
+    def train_test_param(self,X_train, X_test, y_train, y_test):
+        self.X_train = X_train
+        self.X_test = X_test
+        self.y_train = y_train
+        self.y_test = y_test
 
     @Slot(dict)
     def handle_training_results(self, trained_models, results):
@@ -230,69 +328,40 @@ class MainWindow(QMainWindow):
     
     def dataset_info_tab(self):
         self.ui.stackedWidget_3.setCurrentWidget(self.ui.dataset_information_page)
-        summary = []
-
-        for col in self.df.columns:
-            data = self.df[col]
-            summary.append({
-                'Feature': col,
-                'Type': data.dtype,
-                'Nulls': data.isnull().sum(),
-                'Unique': data.nunique(),
-                'Min': data.min() if pd.api.types.is_numeric_dtype(data) else None,
-                'Max': data.max() if pd.api.types.is_numeric_dtype(data) else None,
-                'Mean': data.mean() if pd.api.types.is_numeric_dtype(data) else None,
-                'Mode': data.mode().iloc[0] if not data.mode().empty else None
-            })
-            
-        summary_df = pd.DataFrame(summary)
-        self.populate_summary_table(summary_df,self.ui.tableWidget)
+        self.populate_summary_table(self.dataset_profile().summary, self.summary_view)
 
     def feature_info_tab(self):
         self.ui.stackedWidget_3.setCurrentWidget(self.ui.custom_information)
         self.ui.listWidget.addItems(self.df.columns)
         self.ui.listWidget.itemClicked.connect(self.display_feature_info)
 
-    def populate_summary_table(self,summary_df, table_widget: QTableWidget):
-        table_widget.setRowCount(len(summary_df))
-        table_widget.setColumnCount(len(summary_df.columns))
-        table_widget.setHorizontalHeaderLabels(summary_df.columns)
-
-        for row in range(len(summary_df)):
-            for col in range(len(summary_df.columns)):
-                value = summary_df.iloc[row, col]
-                # Convert dicts (like Top 5 Values) to string
-                if isinstance(value, dict):
-                    value = ', '.join(f"{k}: {v}" for k, v in value.items())
-                item = QTableWidgetItem(str(value))
-                table_widget.setItem(row, col, item)
+    def populate_summary_table(self,summary_df, table_view: QTableView):
+        # The model reads cells from summary_df when they are painted, nothing is copied into items
+        table_view.setModel(DataFrameModel(summary_df, table_view))
     
-    def display_feature_info(self, item):
-        import pandas as pd
+    def preview_data(self):
+        if getattr(self, 'df', None) is None:
+            QMessageBox.warning(self, "No Data", "Please load a dataset first.")
+            return
+        self.preview_dialog = DataPreviewDialog(self.df, self.filename, self)
+        self.preview_dialog.show()
 
+    def display_feature_info(self, item):
         col = item.text()
-        data = self.df[col]
-
-        percent_missing = data.isnull().sum() / len(data) * 100
-        cardinality = data.nunique()
-        high_card = "🔺 High Cardinality" if cardinality > len(data) * 0.5 else ""
-
-        iqr_info = ""
-        if pd.api.types.is_numeric_dtype(data):
-            q1 = data.quantile(0.25)
-            q3 = data.quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            outliers = ((data < lower_bound) | (data > upper_bound)).sum()
-            iqr_info = f"<b>Outliers:</b> {outliers} (IQR method)<br>"
+        profile = self.dataset_profile()[col]
+
+        percent_missing = profile['nulls'] / profile['rows'] * 100 if profile['rows'] else 0.0
+        cardinality = profile['unique']
+        high_card = "🔺 High Cardinality" if cardinality > profile['rows'] * 0.5 else ""
+
+        numeric = profile['numeric']
+        iqr_info = f"<b>Outliers:</b> {profile['outliers']} (IQR method)<br>" if numeric else ""
 
         # Mode
-        mode_val = data.mode()
-        mode_info = f"<b>Mode:</b> {mode_val[0]}<br>" if not mode_val.empty else ""
+        mode_info = f"<b>Mode:</b> {profile['mode']}<br>" if profile['mode'] is not None else ""
 
         # Top 5 Values
-        top_values = data.value_counts().head(5).to_dict()
+        top_values = dict(list(profile['top_values'].items())[:5])
         top_vals_html = "<b>Top 5 Values:</b><br>" + "<br>".join(f"{val}: {count}" for val, count in top_values.items())
 
         # Extra info panel (right)
@@ -308,14 +377,14 @@ class MainWindow(QMainWindow):
         <div style='display:flex; justify-content:space-between; gap:40px;'>
             <div style='flex:2;'>
                 <h3 style='color:#0078d7;'>{col}</h3>
-                <b>Type:</b> {data.dtype}<br>
-                <b>Missing:</b> {data.isnull().sum()}<br>
-                <b>Unique:</b> {data.nunique()}<br>
-                {f'<b>Min:</b> {data.min()}<br>' if pd.api.types.is_numeric_dtype(data) else ''}
-                {f'<b>Max:</b> {data.max()}<br>' if pd.api.types.is_numeric_dtype(data) else ''}
-                {f'<b>Mean:</b> {data.mean():.2f}<br>' if pd.api.types.is_numeric_dtype(data) else ''}
-                {f'<b>Std Dev:</b> {data.std():.2f}<br>' if pd.api.types.is_numeric_dtype(data) else ''}
-                {f'<b>Median:</b> {data.median()}<br>' if pd.api.types.is_numeric_dtype(data) else ''}
+                <b>Type:</b> {profile['dtype']}<br>
+                <b>Missing:</b> {profile['nulls']}<br>
+                <b>Unique:</b> {profile['unique']}<br>
+                {f'<b>Min:</b> {profile["min"]}<br>' if numeric else ''}
+                {f'<b>Max:</b> {profile["max"]}<br>' if numeric else ''}
+                {f'<b>Mean:</b> {format_stat(profile["mean"])}<br>' if numeric else ''}
+                {f'<b>Std Dev:</b> {format_stat(profile["std"])}<br>' if numeric else ''}
+                {f'<b>Median:</b> {profile["median"]}<br>' if numeric else ''}
                 {mode_info}
             </div>
             <div style='flex:1; background:#f9f9f9; padding:10px; border-left:2px solid #ddd;'>
@@ -356,44 +425,31 @@ class MainWindow(QMainWindow):
             self.visualize_feature(self.df, col)
 
     def visualize_feature(self, df: pd.DataFrame, column: str):
-        plt.clf()
-        plt.figure(figsize=(6, 4))
-        sns.set_theme(style="whitegrid")
-
-        dtype = df[column].dtype
-        unique_count = df[column].nunique()
-
-        try:
-            if pd.api.types.is_numeric_dtype(dtype):
-                if unique_count < 10:
-                    sns.countplot(x=column, data=df)
-                    plt.title(f"Count Plot: {column}")
-                else:
-                    sns.histplot(df[column].dropna(), kde=True, bins=30, color="skyblue")
-                    plt.title(f"Histogram: {column}")
-            elif pd.api.types.is_categorical_dtype(dtype) or dtype == object:
-                if unique_count <= 10:
-                    df[column].value_counts().plot.pie(autopct='%1.1f%%', figsize=(5, 5))
-                    plt.ylabel('')
-                    plt.title(f"Pie Chart: {column}")
-                else:
-                    sns.countplot(y=column, data=df, order=df[column].value_counts().index[:10])
-                    plt.title(f"Top 10 Categories: {column}")
-            elif pd.api.types.is_datetime64_any_dtype(dtype):
-                df[column].value_counts().sort_index().plot()
-                plt.title(f"Time Series: {column}")
-                plt.xlabel("Date")
-                plt.ylabel("Count")
-            else:
-                self.ui.label_17.setText("❌ Unsupported data type for visualization.")
-                return
-
-            img_path = "feature_plot.png"
-            plt.tight_layout()
-            plt.savefig(img_path)
-            self.ui.label_17.setPixmap(QPixmap(img_path))
-        except Exception as e:
-            self.ui.label_17.setText(f"⚠️ Error generating plot: {e}")
+        # Drawn on the render pool, show_rendered_plot puts it on label_17
+        size = (self.ui.label_17.width(), self.ui.label_17.height())
+        self.ui.label_17.setText(f"Rendering {column}...")
+        # The profile, once built, supplies the plotted counts and histogram
+        self.plot_renderer.request('feature', render_feature_plot, df, column, size, self.profile,
+                                   cache_key=plot_key(self.dataset_key, [column], 'feature', size))
+
+    @Slot(str, int, object)
+    def show_rendered_plot(self, target, request_id, png):
+        # A newer request for the same label may have been made while this one was queued
+        if not self.plot_renderer.is_current(target, request_id):
+            return
+        pixmap = QPixmap()
+        pixmap.loadFromData(png, 'PNG')
+        label = self.ui.label_17 if target == 'feature' else self.ui.label_22
+        label.setPixmap(pixmap)
+
+    @Slot(str, int, str)
+    def show_plot_error(self, target, request_id, message):
+        if not self.plot_renderer.is_current(target, request_id):
+            return
+        if target == 'feature':
+            self.ui.label_17.setText(f"⚠️ Error generating plot: {message}")
+        else:
+            QMessageBox.critical(self, "Plot Error", message)
 
     def generate_chart(self):
         if self.df is None:
@@ -408,58 +464,9 @@ class MainWindow(QMainWindow):
             return
 
         chart = self.ui.comboBox.currentText()
-
-        plt.clf()
-        plt.figure(figsize=(6, 4))
-        sns.set_theme(style="whitegrid")
-
-        try:
-            if chart == "Histogram":
-                for col in selected_columns:
-                    if pd.api.types.is_numeric_dtype(self.df[col]):
-                        sns.histplot(self.df[col], kde=True, label=col)
-                plt.legend()
-                plt.title("Histogram")
-
-            elif chart == "Boxplot":
-                if len(selected_columns) == 1:
-                    sns.boxplot(y=self.df[selected_columns[0]])
-                else:
-                    sns.boxplot(data=self.df[selected_columns])
-                plt.title("Boxplot")
-
-            elif chart == "Violin Plot":
-                if len(selected_columns) == 1:
-                    sns.violinplot(y=self.df[selected_columns[0]])
-                elif len(selected_columns) == 2:
-                    sns.violinplot(x=self.df[selected_columns[0]], y=self.df[selected_columns[1]])
-                else:
-                    raise Exception("Violin Plot supports only 1 or 2 features.")
-
-            elif chart == "Scatter Plot":
-                if len(selected_columns) != 2:
-                    raise Exception("Scatter Plot requires exactly 2 features.")
-                sns.scatterplot(
-                    x=self.df[selected_columns[0]], y=self.df[selected_columns[1]]
-                )
-                plt.title("Scatter Plot")
-
-            elif chart == "Count Plot":
-                if len(selected_columns) != 1:
-                    raise Exception("Count Plot supports only 1 categorical feature.")
-                sns.countplot(x=self.df[selected_columns[0]])
-                plt.title("Count Plot")
-
-            else:
-                raise Exception("Unsupported chart type.")
-
-            plt.tight_layout()
-            plot_path = "custom_plot.png"
-            plt.savefig(plot_path)
-            self.ui.label_22.setPixmap(QPixmap(plot_path))
-
-        except Exception as e:
-            QMessageBox.critical(self, "Plot Error", str(e))
+        size = (self.ui.label_22.width(), self.ui.label_22.height())
+        self.plot_renderer.request('chart', render_chart, self.df, chart, selected_columns, size,
+                                   cache_key=plot_key(self.dataset_key, selected_columns, chart, size))
 
     ##### visualisation tab end ####
 
@@ -514,24 +521,69 @@ class MainWindow(QMainWindow):
         self.ui.generate_button_2.clicked.connect(self.custom_model_training)
 
     def custom_model_training(self):
+        from custom_training import train_custom_model, sweep_forest_estimators
+
+        if getattr(self, 'X_train', None) is None:
+            QMessageBox.warning(self, "No Training Data",
+                                "Custom training needs the in-memory train/test split. Train the dataset first; "
+                                "datasets trained out-of-core do not keep one.")
+            return
+
         problem_type = self.ui.comboBox_3.currentText()
         model_name = self.ui.comboBox_2.currentText()
-        input_1 = self.ui.lineEdit.text()
-        input_2 = self.ui.lineEdit_2.text()
-        trainable_params = {}
-        param_keys = []
+        inputs = [self.ui.lineEdit.text(), self.ui.lineEdit_2.text()]
         params = MODEL_PARAMS[problem_type].get(model_name, {})
-        for param,value in params.items():
-            param_keys.append(param)
-        trainable_params[param_keys[0]]  = input_1
-        trainable_params[param_keys[1]]  = input_2
-        print(params,type(params))
-        score = train_custom_model(problem_type, model_name, trainable_params, self.X_train, self.X_test, self.y_train, self.y_test)
-        print(score)
-        print(problem_type,model_name,input_1,input_2)
+        # "low:high" or "a,b,c" in a box searches that parameter instead of training one value
+        try:
+            trainable_params = {param: parse_param_input(text, param_type)
+                                for (param, param_type), text in zip(params.items(), inputs) if text.strip()}
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Input", str(e))
+            return
+
+        searched = [param for param, value in trainable_params.items() if isinstance(value, tuple)]
+        if searched == ['n_estimators'] and model_name == 'random_forest':
+            # Only the forest size varies: grow one forest through every size instead of searching
+            self.search_worker = SearchWorker(sweep_forest_estimators, problem_type, trainable_params,
+                                              sweep_values(trainable_params['n_estimators']),
+                                              self.X_train, self.X_test, self.y_train, self.y_test)
+            self.search_worker.finished.connect(self.handle_sweep_results)
+            self.search_worker.error.connect(self.handle_thread_error)
+            threading.Thread(target=self.search_worker.run, daemon=True).start()
+            return
+        if searched:
+            self.search_worker = SearchWorker(HyperparameterSearch(problem_type, model_name, trainable_params).run,
+                                              self.X_train, self.X_test, self.y_train, self.y_test)
+            self.search_worker.finished.connect(self.handle_search_results)
+            self.search_worker.error.connect(self.handle_thread_error)
+            threading.Thread(target=self.search_worker.run, daemon=True).start()
+            return
+
+        if model_name == 'neural_network':
+            # The network needs every parameter, empty boxes take the defaults
+            defaults = DEFAULT_MODEL_PARAMS['neural_network']
+            trainable_params = {**{param: defaults[param] for param in params}, **trainable_params}
+        metrics = train_custom_model(problem_type, model_name, trainable_params, self.X_train, self.X_test, self.y_train, self.y_test)
+        QMessageBox.information(self, "Custom Training",
+                                "\n".join(f"{metric}: {value}" for metric, value in metrics.items()))
+
+    @Slot(object)
+    def handle_sweep_results(self, result):
+        _, curve = result
+        lines = [f"n_estimators={n_estimators}: {metrics}" for n_estimators, metrics in curve]
+        QMessageBox.information(self, "n_estimators Sweep", "\n".join(lines))
+
+    @Slot(object)
+    def handle_search_results(self, result):
+        statuses = [trial['status'] for trial in result['trials']]
+        summary = ", ".join(f"{status}: {statuses.count(status)}" for status in sorted(set(statuses)))
+        QMessageBox.information(self, "Hyperparameter Search",
+                                f"Best {result['metric']}: {result['best_score']}\n"
+                                f"Best parameters: {result['best_params']}\n\nTrials - {summary}")
     
     def save_model(self):
-        self.pipeliner.save_models(self.trained_models)
+        version = self.pipeliner.save_models(self.trained_models, dataset_path=self.dataset_path)
+        QMessageBox.information(self, "Models Saved", f"Saved as version {version} in {self.pipeliner.registry.root}")
         
     def display_model_information(self, item):
         model_name = item.text()
@@ -547,7 +599,13 @@ class MainWindow(QMainWindow):
                 name_key = "random_forest_regressor"
 
         defaults = DEFAULT_MODEL_PARAMS.get(name_key, {})
+        if name_key == 'kmeans' and self.pipeliner.k_curve:
+            # k was chosen automatically, show it and the curve it was chosen from
+            defaults = {**defaults, 'n_clusters': self.trained_models['kmeans'].n_clusters}
         param_text = "\n".join([f"{k}: {v}" for k, v in defaults.items()]) or "No parameters available"
+        if name_key == 'kmeans' and self.pipeliner.k_curve:
+            param_text += "\n\nInertia by k:\n" + "\n".join(
+                f"k={point['k']}: {point['inertia']:.1f}" for point in self.pipeliner.k_curve)
 
         display_text = f"Model: {model_name}\n\nError: {error}\nAccuracy: {accuracy}\n\nDefault Parameters:\n{param_text}"
         self.ui.label_33.setText(display_text)
@@ -556,4 +614,4 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)  # Create the application
     window = MainWindow()         # Create the main window
     window.show()                 # Show the main window
-    sys.exit(app.exec())  
\ No newline at end of file
+    sys.exit(app.exec()) 
\ No newline at end of file
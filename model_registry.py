@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+
+import joblib
+
+from preprocessing import Preprocessor
+
+REGISTRY_DIR = os.environ.get('AUTODS_REGISTRY_DIR', 'saved_models')
+MANIFEST_FILE = 'manifest.json'
+PREPROCESSOR_FILE = 'preprocessor.pkl'
+# Estimators are pickled once, compressed. They are not memory-mapped: sklearn trees copy their
+# node arrays into their own buffers when unpickled, so forests would be read in full anyway.
+COMPRESSION = ('zlib', 3)
+
+
+class ModelRegistry:
+    # One directory per run: <root>/<version>/ holds the model artifacts, the fitted
+    # preprocessor and manifest.json describing the data, features and metrics
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def register(self, models, preprocessor=None, metrics=None, dataset_fingerprint=None, dataset_path=None,
+                 problem_type=None, target=None, features=None, training_time_s=None):
+        os.makedirs(self.root, exist_ok=True)
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        # Written under a temporary name and renamed, so a half-written version is never listed
+        tmp_dir = os.path.join(self.root, f'.{version}.tmp')
+        os.makedirs(tmp_dir)
+        try:
+            artifacts = {}
+            for name, model in models.items():
+                if 'neural_network' in name:
+                    filename, fmt = f'{name}.h5', 'keras'
+                    model.save(os.path.join(tmp_dir, filename))
+                else:
+                    filename, fmt = f'{name}.joblib', 'joblib'
+                    joblib.dump(model, os.path.join(tmp_dir, filename), compress=COMPRESSION)
+                artifacts[name] = {'file': filename, 'format': fmt, 'bytes': os.path.getsize(os.path.join(tmp_dir, filename))}
+
+            preprocessing = None
+            if preprocessor is not None:
+                preprocessor.save(os.path.join(tmp_dir, PREPROCESSOR_FILE))
+                preprocessing = {
+                    'file': PREPROCESSOR_FILE,
+                    'problem_type': preprocessor.problem_type,
+                    'target_column': preprocessor.target_column,
+                }
+
+            manifest = {
+                'version': version,
+                'created': time.time(),
+                'dataset_fingerprint': dataset_fingerprint,
+                'dataset_path': os.path.abspath(dataset_path) if dataset_path else None,
+                'problem_type': problem_type,
+                'target': target,
+                'features': list(features) if features is not None else None,
+                'metrics': {name: float(score) for name, score in (metrics or {}).items()},
+                'training_time_s': training_time_s,
+                'preprocessing': preprocessing,
+                'artifacts': artifacts,
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_dir, self.version_dir(version))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return version
+
+    def manifest(self, version):
+        with open(os.path.join(self.version_dir(version), MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def list_versions(self):
+        # Newest first
+        manifests = []
+        if not os.path.isdir(self.root):
+            return manifests
+        for name in os.listdir(self.root):
+            if os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE)):
+                manifests.append(self.manifest(name))
+        return sorted(manifests, key=lambda manifest: manifest['created'], reverse=True)
+
+    def latest(self):
+        versions = self.list_versions()
+        return versions[0]['version'] if versions else None
+
+    def load(self, version=None, names=None):
+        # Returns (models, preprocessor, manifest); version=None loads the newest one
+        version = version or self.latest()
+        if version is None:
+            raise FileNotFoundError(f"No model versions in {self.root}")
+        manifest = self.manifest(version)
+        version_dir = self.version_dir(version)
+        models = {}
+        for name, artifact in manifest['artifacts'].items():
+            if names is not None and name not in names:
+                continue
+            path = os.path.join(version_dir, artifact['file'])
+            if artifact['format'] == 'keras':
+                from tensorflow.keras.models import load_model
+                models[name] = load_model(path)
+            else:
+                models[name] = joblib.load(path)
+        preprocessor = None
+        if manifest['preprocessing'] is not None:
+            preprocessor = Preprocessor.load(os.path.join(version_dir, manifest['preprocessing']['file']))
+        return models, preprocessor, manifest
+
+    def delete(self, version):
+        shutil.rmtree(self.version_dir(version))
+
+    def prune(self, keep=5):
+        # Removes all but the `keep` newest versions
+        removed = [manifest['version'] for manifest in self.list_versions()[keep:]]
+        for version in removed:
+            self.delete(version)
+        return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List, inspect or prune saved model versions")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="list saved versions, newest first")
+    show = commands.add_parser('show', help="print the manifest of a version")
+    show.add_argument('version', nargs='?', help="defaults to the newest version")
+    prune = commands.add_parser('prune', help="remove all but the newest versions")
+    prune.add_argument('keep', type=int)
+    delete = commands.add_parser('delete', help="remove one version")
+    delete.add_argument('version')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.registry_dir)
+    if args.command == 'list':
+        for manifest in registry.list_versions():
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(manifest['created']))
+            metrics = ', '.join(f"{name}={score:.4f}" for name, score in manifest['metrics'].items())
+            print(f"{manifest['version']}  {created}  {manifest['problem_type']}  target={manifest['target']}  {metrics}")
+    elif args.command == 'show':
+        print(json.dumps(registry.manifest(args.version or registry.latest()), indent=2))
+    elif args.command == 'prune':
+        print(f"Removed {len(registry.prune(args.keep))} model versions")
+    elif args.command == 'delete':
+        registry.delete(args.version)
+        print(f"Removed {args.version}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
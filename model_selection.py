@@ -0,0 +1,83 @@
+import math
+
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split
+
+from training_engine import LOWER_IS_BETTER
+
+
+def subsample(X, y, n_rows, problem_type, random_state=42):
+    if n_rows >= len(X):
+        return X, y
+    stratify = y if problem_type == 'classification' else None
+    try:
+        X_sub, _, y_sub, _ = train_test_split(X, y, train_size=n_rows, stratify=stratify, random_state=random_state)
+    except ValueError:
+        # Classes with a single row cannot be stratified
+        X_sub, _, y_sub, _ = train_test_split(X, y, train_size=n_rows, random_state=random_state)
+    return X_sub, y_sub
+
+
+class SuccessiveHalving:
+    # Every rung trains the surviving candidates on `factor` times more rows than the last one and
+    # keeps the best 1/factor of them; only the final survivors are trained on the full training set.
+    def __init__(self, trainer, factor=3, min_rows=500, validation_size=0.2, max_validation_rows=50_000, random_state=42):
+        # trainer: training_engine.ParallelTrainer used for every rung and the final fit
+        self.trainer = trainer
+        self.factor = factor
+        self.min_rows = min_rows
+        self.validation_size = validation_size
+        self.max_validation_rows = max_validation_rows
+        self.random_state = random_state
+        self.history = []
+        self.timed_out = []
+
+    def _rank(self, problem_type, scores):
+        return sorted(scores, key=scores.get, reverse=problem_type not in LOWER_IS_BETTER)
+
+    def select(self, problem_type, models, local_models, X_train, X_test, y_train, y_test):
+        # models / local_models as in ParallelTrainer.train; returns (models, results) for the survivors
+        # history: rows, scores, survivors and timed_out per rung; timed_out: every candidate that
+        # timed out on any rung or in the final fit
+        self.history = []
+        self.timed_out = []
+        survivors = list(models) + list(local_models)
+
+        if len(survivors) > 1:
+            # Rungs are scored on a validation split of the training rows, the test rows stay untouched
+            X_fit, X_val, y_fit, y_val = train_test_split(X_train, y_train, test_size=self.validation_size, random_state=self.random_state)
+            X_val, y_val = subsample(X_val, y_val, self.max_validation_rows, problem_type, self.random_state)
+
+            n_rungs = math.ceil(math.log(len(survivors), self.factor))
+            rows = max(self.min_rows, len(X_fit) // self.factor ** n_rungs)
+            while len(survivors) > 1 and rows < len(X_fit):
+                X_sub, y_sub = subsample(X_fit, y_fit, rows, problem_type, self.random_state)
+                _, scores = self.trainer.train(
+                    problem_type,
+                    {name: clone(models[name]) for name in survivors if name in models},
+                    X_sub, X_val, y_sub, y_val,
+                    {name: local_models[name] for name in survivors if name in local_models},
+                )
+                # The trainer resets timed_out on every call
+                timed_out = list(self.trainer.timed_out)
+                self.timed_out.extend(timed_out)
+                if not scores:
+                    # Every candidate timed out on this rung, so the rung cannot rank them:
+                    # stop halving and train the current survivors on the full data
+                    self.history.append({'rows': len(X_sub), 'scores': scores, 'survivors': survivors, 'timed_out': timed_out})
+                    break
+                # Candidates that timed out on a rung are dropped with the losers
+                keep = max(1, math.ceil(len(survivors) / self.factor))
+                ranked = self._rank(problem_type, scores)
+                survivors = ranked[:keep]
+                self.history.append({'rows': len(X_sub), 'scores': scores, 'survivors': survivors, 'timed_out': timed_out})
+                rows *= self.factor
+
+        trained, results = self.trainer.train(
+            problem_type,
+            {name: models[name] for name in survivors if name in models},
+            X_train, X_test, y_train, y_test,
+            {name: local_models[name] for name in survivors if name in local_models},
+        )
+        self.timed_out.extend(name for name in self.trainer.timed_out if name not in self.timed_out)
+        return trained, results
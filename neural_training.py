@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+# TensorFlow is imported inside the functions below, so importing this module (and pipeline.py or
+# custom_training.py through it) stays cheap until a network is actually built or trained
+
+VALIDATION_SPLIT = 0.1
+PATIENCE = 3
+# Batches shuffled per epoch; rows are shuffled once up front, so batch order is enough
+SHUFFLE_BATCHES = 1024
+
+_threads_configured = False
+
+
+def configure_threads(intra_op=None, inter_op=None):
+    # Only takes effect before TensorFlow runs its first op; 0 lets TensorFlow choose.
+    # Defaults come from AUTODS_TF_INTRA_OP_THREADS / AUTODS_TF_INTER_OP_THREADS.
+    global _threads_configured
+    if _threads_configured:
+        return
+    import tensorflow as tf
+
+    intra_op = intra_op if intra_op is not None else int(os.environ.get('AUTODS_TF_INTRA_OP_THREADS', 0))
+    inter_op = inter_op if inter_op is not None else int(os.environ.get('AUTODS_TF_INTER_OP_THREADS', 0))
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError:
+        # The runtime is already initialised, keep its settings
+        pass
+    _threads_configured = True
+
+
+def build_network(problem_type, n_features, n_classes=None):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense
+
+    if problem_type == 'classification':
+        nn_model = Sequential([
+            Dense(64, activation='relu', input_shape=(n_features,)),
+            Dense(32, activation='relu'),
+            Dense(n_classes, activation='softmax')
+        ])
+        nn_model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    else:
+        nn_model = Sequential([
+            Dense(64, activation='relu', input_shape=(n_features,)),
+            Dense(32, activation='relu'),
+            Dense(1)
+        ])
+        nn_model.compile(optimizer='adam', loss='mse')
+    return nn_model
+
+
+def to_arrays(problem_type, X, y=None):
+    X = np.asarray(X, dtype=np.float32)
+    if y is None:
+        return X, None
+    return X, np.asarray(y, dtype=np.int32 if problem_type == 'classification' else np.float32)
+
+
+def make_dataset(X, y=None, batch_size=32, shuffle=False, seed=42):
+    import tensorflow as tf
+
+    # Batched before caching so every epoch replays ready-made float32 batches
+    dataset = tf.data.Dataset.from_tensor_slices(X if y is None else (X, y)).batch(batch_size).cache()
+    if shuffle:
+        dataset = dataset.shuffle(SHUFFLE_BATCHES, seed=seed, reshuffle_each_iteration=True)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def fit_network(problem_type, nn_model, X_train, y_train, epochs=10, batch_size=32,
+                validation_split=VALIDATION_SPLIT, patience=PATIENCE, seed=42):
+    # epochs is the upper bound: training stops once validation loss has not improved for
+    # `patience` epochs, and the weights of the best epoch are restored
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    configure_threads()
+    X_train, y_train = to_arrays(problem_type, X_train, y_train)
+    order = np.random.default_rng(seed).permutation(len(X_train))
+    n_val = int(len(order) * validation_split)
+
+    callbacks = []
+    validation = None
+    if n_val > 0:
+        val_rows, order = order[:n_val], order[n_val:]
+        validation = make_dataset(X_train[val_rows], y_train[val_rows], batch_size)
+        callbacks.append(EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True))
+    train = make_dataset(X_train[order], y_train[order], batch_size, shuffle=True, seed=seed)
+    return nn_model.fit(train, validation_data=validation, epochs=epochs, callbacks=callbacks, verbose=0)
+
+
+def predict_network(problem_type, nn_model, X, batch_size=1024):
+    configure_threads()
+    X, _ = to_arrays(problem_type, X)
+    predictions = nn_model.predict(make_dataset(X, batch_size=batch_size), verbose=0)
+    if problem_type == 'classification':
+        return predictions.argmax(axis=1)
+    return predictions.flatten()
@@ -1,30 +1,95 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.linear_model import LogisticRegression, LinearRegression
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.cluster import KMeans
-from sklearn.metrics import accuracy_score, mean_squared_error, silhouette_score
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
-import pickle
-import spacy
-import re
-import os
+from training_engine import ParallelTrainer, score_predictions
+from dataset_cache import DatasetCache, load_dataset
+from data_loader import read_csv_sample
+from preprocessing import Preprocessor
+from streaming_training import StreamingTrainer, should_stream
+from caching import LRUCache, normalize_statement, schema_fingerprint
+from instrumentation import Instrumentation, peak_rss_mb
+from model_selection import SuccessiveHalving
+from k_selection import KSelector
+from neural_training import build_network, fit_network, predict_network
+from model_registry import ModelRegistry, REGISTRY_DIR
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HALVING_MIN_ROWS = 1_000_000
+
+SPACY_MODEL = 'en_core_web_sm'
+SPACY_PIPES = ['tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner', 'senter']
+
+# Components each NLP step needs, everything else is excluded when the model is loaded
+NLP_STEPS = {
+    'tokenizer': [],
+    'parser': ['tok2vec', 'parser'],
+}
+
+def load_nlp(step):
+    import spacy
+
+    keep = NLP_STEPS[step]
+    return spacy.load(SPACY_MODEL, exclude=[pipe for pipe in SPACY_PIPES if pipe not in keep])
 
 class AutoMLPipeline:
-    def __init__(self):
-        self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, n_jobs=None, model_timeout=None, cache_size=1024, instrumentation=None, selection='full', halving_factor=3, nn_epochs=10,
+                 registry_dir=REGISTRY_DIR, k_selection=None):
+        self.n_jobs = n_jobs
+        # Upper bound for the network, early stopping on a validation split usually ends it sooner
+        self.nn_epochs = nn_epochs
+        self.model_timeout = model_timeout
+        # selection: 'full' trains every candidate on all rows, 'halving' eliminates weak ones on subsamples
+        # first, 'auto' uses halving once the training set has HALVING_MIN_ROWS rows
+        self.selection = selection
+        self.halving_factor = halving_factor
+        self.selection_history = []
+        # k_selection: None keeps KMeans(n_clusters=3), 'elbow' or 'silhouette' picks k with KSelector;
+        # k_curve holds inertia (and silhouette) per k of the last selection
+        self.k_selection = k_selection
+        self.k_curve = []
+        # Hooks and timing records for every stage and model fit, see instrumentation.Instrumentation
+        self.instrumentation = instrumentation or Instrumentation()
+        # Keyed by normalized statement (and schema fingerprint for targets), repeated jobs skip spaCy
+        self.analysis_cache = LRUCache(cache_size)
+        self.target_cache = LRUCache(cache_size)
+        self._nlp_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spacy-loader')
+        self._nlp_lock = threading.Lock()
+        self._nlp_futures = {}
         self.models = {}
         self.problem_type = None
         self.target_column = None
         self.feature_columns = None
-        
+        self.preprocessor = None
+        # Every save_models call adds a version to the registry, described by the fields below
+        self.registry = ModelRegistry(registry_dir)
+        self.dataset_path = None
+        self.results = {}
+        self.training_time_s = None
+
+    def preload_nlp(self, steps=('tokenizer', 'parser')):
+        # Start loading in the background, the first get_nlp call waits only for what is left
+        for step in steps:
+            self._nlp_future(step)
+
+    def _nlp_future(self, step):
+        with self._nlp_lock:
+            if step not in self._nlp_futures:
+                self._nlp_futures[step] = self._nlp_loader.submit(load_nlp, step)
+            return self._nlp_futures[step]
+
+    def get_nlp(self, step):
+        return self._nlp_future(step).result()
+
     def analyze_problem_statement(self, statement):
-        doc = self.nlp(statement.lower())
-        
+        statement = normalize_statement(statement)
+        with self.instrumentation.stage('analyze_problem_statement'):
+            return self.analysis_cache.get_or_compute(statement, lambda: self._problem_type_from_doc(self.get_nlp('tokenizer')(statement), statement))
+
+    def _problem_type_from_doc(self, doc, statement):
         supervised_keywords = ['predict', 'classification', 'regression', 'forecast']
         unsupervised_keywords = ['cluster', 'group', 'segment', 'pattern']
         reinforcement_keywords = ['reward', 'action', 'agent', 'environment', 'policy']
@@ -34,7 +99,7 @@ class AutoMLPipeline:
         reinforcement_count = sum(1 for word in doc if any(keyword in word.text for keyword in reinforcement_keywords))
         
         if supervised_count > max(unsupervised_count, reinforcement_count):
-            if any(word in statement.lower() for word in ['classify', 'category', 'class']):
+            if any(word in statement for word in ['classify', 'category', 'class']):
                 return 'classification'
             else:
                 return 'regression'
@@ -44,121 +109,223 @@ class AutoMLPipeline:
             return 'reinforcement'
 
     def identify_features(self, df, problem_statement):
-        doc = self.nlp(problem_statement.lower())
+        statement = normalize_statement(problem_statement)
+        # Steps 1 and 2a only depend on the statement and the column names, so they are cached per schema
+        with self.instrumentation.stage('identify_features', rows=len(df)):
+            key = (statement, schema_fingerprint(df))
+            target = self.target_cache.get_or_compute(key, lambda: self._target_from_doc(self.get_nlp('parser')(statement), df.columns))
+            return self._set_target(df, target)
 
+    def _target_from_doc(self, doc, columns):
         # Step 1: Try extracting target variable from the problem statement
         potential_targets = []
         for token in doc:
-            if token.dep_ in ['dobj', 'pobj', 'attr', 'nsubj'] and token.text in df.columns:
+            if token.dep_ in ['dobj', 'pobj', 'attr', 'nsubj'] and token.text in columns:
                 potential_targets.append(token.text)
 
         # Step 2: Use extracted target if found, otherwise apply heuristics
         if potential_targets:
-            self.target_column = potential_targets[0]
-        else:
-            # Heuristic 1: If a column contains keywords like 'target', 'label', 'price', 'score', 'class'
-            possible_target_columns = [col for col in df.columns if any(keyword in col.lower() 
-                                                                        for keyword in ['target', 'label', 'price', 'score', 'class'])]
-            if possible_target_columns:
-                self.target_column = possible_target_columns[0]
-            else:
-                # Heuristic 2: If classification, choose column with few unique values
-                if self.problem_type == 'classification':
-                    self.target_column = df.nunique().idxmin()
-                else:
-                    # Heuristic 3: If regression, choose a numerical column with higher variance
-                    num_columns = df.select_dtypes(include=['number']).columns
-                    self.target_column = df[num_columns].var().idxmax() if not num_columns.empty else df.columns[-1]
+            return potential_targets[0]
+
+        # Heuristic 1: If a column contains keywords like 'target', 'label', 'price', 'score', 'class'
+        possible_target_columns = [col for col in columns if any(keyword in col.lower() 
+                                                                 for keyword in ['target', 'label', 'price', 'score', 'class'])]
+        if possible_target_columns:
+            return possible_target_columns[0]
+        return None
+
+    def _set_target(self, df, target):
+        self.target_column = self._resolve_target(df, target, self.problem_type)
 
         # Step 3: Set feature columns
         self.feature_columns = [col for col in df.columns if col != self.target_column]
 
         return self.target_column, self.feature_columns
 
-    def preprocess_data(self, df):
-        df = df.fillna(df.mean() if self.problem_type != 'classification' else df.mode().iloc[0])
-        
-        for column in df.columns:
-            if df[column].dtype == 'object':
-                le = LabelEncoder()
-                df[column] = le.fit_transform(df[column].astype(str))
-        
-        scaler = StandardScaler()
-        df_scaled = pd.DataFrame(scaler.fit_transform(df), columns=df.columns)  
-        
-        return df_scaled
+    def _resolve_target(self, df, target, problem_type):
+        if target is not None:
+            return target
+        # Heuristic 2: If classification, choose column with few unique values
+        if problem_type == 'classification':
+            return df.nunique().idxmin()
+        # Heuristic 3: If regression, choose a numerical column with higher variance
+        num_columns = df.select_dtypes(include=['number']).columns
+        return df[num_columns].var().idxmax() if not num_columns.empty else df.columns[-1]
 
-    def train_models(self, problem_type, X_train, X_test, y_train, y_test):
-        self.models = {}
+    def analyze_batch(self, pairs, batch_size=256, n_process=1):
+        # pairs: iterable of (statement, df) where df has the dataset's columns (a sample is enough
+        # unless the value heuristics are needed). Returns (problem_type, target_column) per pair.
+        pairs = [(normalize_statement(statement), df) for statement, df in pairs]
+        fingerprints = [schema_fingerprint(df) for _, df in pairs]
+
+        # Every statement missing from either cache is parsed once with the parser pipeline,
+        # whose doc serves both the problem type and the target lookup
+        to_parse = {}
+        for (statement, _), fingerprint in zip(pairs, fingerprints):
+            if statement not in self.analysis_cache or (statement, fingerprint) not in self.target_cache:
+                to_parse[statement] = None
+        nlp = self.get_nlp('parser')
+        docs = dict(zip(to_parse, nlp.pipe(to_parse, batch_size=batch_size, n_process=n_process)))
+
+        def doc_for(statement):
+            # Entries can be evicted between the check above and the lookup below on a small cache
+            if statement not in docs:
+                docs[statement] = nlp(statement)
+            return docs[statement]
+
+        results = []
+        for (statement, df), fingerprint in zip(pairs, fingerprints):
+            problem_type = self.analysis_cache.get_or_compute(statement, lambda: self._problem_type_from_doc(doc_for(statement), statement))
+            target = self.target_cache.get_or_compute((statement, fingerprint), lambda: self._target_from_doc(doc_for(statement), df.columns))
+            results.append((problem_type, self._resolve_target(df, target, problem_type)))
+        return results
 
+    def cache_info(self):
+        return {
+            'analyze_problem_statement': self.analysis_cache.stats(),
+            'identify_features': self.target_cache.stats(),
+        }
+
+    def preprocess_data(self, df, fit=True):
+        # Fits a new Preprocessor on df, or reuses the fitted one when fit is False
+        if fit or self.preprocessor is None:
+            self.preprocessor = Preprocessor(self.problem_type, self.target_column).fit(df)
+        return self.preprocessor.transform(df)
+
+    def split_and_preprocess(self, df, feature_cols, target_col, test_size=0.2, random_state=42):
+        # The preprocessor only sees the training rows, the test rows are transformed with its fitted state
+        self.target_column, self.feature_columns = target_col, list(feature_cols)
+        with self.instrumentation.stage('preprocess_data', rows=len(df)):
+            train_df, test_df = train_test_split(df[feature_cols + [target_col]], test_size=test_size, random_state=random_state)
+            train_processed = self.preprocess_data(train_df)
+            test_processed = self.preprocess_data(test_df, fit=False)
+        return train_processed[feature_cols], test_processed[feature_cols], train_processed[target_col], test_processed[target_col]
+
+    def _build_neural_network(self, problem_type, n_features, n_classes=None):
+        return build_network(problem_type, n_features, n_classes)
+
+    def _train_neural_network(self, problem_type, X_train, y_train):
+        # Labels are codes 0..k-1, a subsample may not contain every class
+        n_classes = int(np.max(y_train)) + 1 if problem_type == 'classification' else None
+        nn_model = self._build_neural_network(problem_type, X_train.shape[1], n_classes)
+        fit_network(problem_type, nn_model, X_train, y_train, epochs=self.nn_epochs, batch_size=32)
+        return nn_model
+
+    def _predict_neural_network(self, problem_type, nn_model, X):
+        return predict_network(problem_type, nn_model, X)
+
+    def _fit_neural_network(self, problem_type, X_train, X_test, y_train, y_test):
+        nn_model = self._train_neural_network(problem_type, X_train, y_train)
+        y_pred = self._predict_neural_network(problem_type, nn_model, X_test)
+        return nn_model, score_predictions(problem_type, X_test, y_test, y_pred)
+
+    def candidate_models(self, problem_type):
         if problem_type == 'classification':
-            self.models = {
+            return {
                 'logistic_regression': LogisticRegression(),
                 'random_forest': RandomForestClassifier()
             }
-            nn_model = Sequential([
-                Dense(64, activation='relu', input_shape=(X_train.shape[1],)),
-                Dense(32, activation='relu'),
-                Dense(len(np.unique(y_train)), activation='softmax')
-            ])
-            nn_model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
-
         elif problem_type == 'regression':
-            self.models = {
+            return {
                 'linear_regression': LinearRegression(),
                 'random_forest': RandomForestRegressor()
             }
-            nn_model = Sequential([
-                Dense(64, activation='relu', input_shape=(X_train.shape[1],)),
-                Dense(32, activation='relu'),
-                Dense(1)
-            ])
-            nn_model.compile(optimizer='adam', loss='mse')
-
         elif problem_type == 'unsupervised':
-            self.models = {
+            return {
                 'kmeans': KMeans(n_clusters=3)
             }
+        return {}
 
-        results = {}
-        for name, model in self.models.items():
-            model.fit(X_train, y_train)
-            if problem_type == 'classification':
-                y_pred = model.predict(X_test)
-                results[name] = accuracy_score(y_test, y_pred)
-            elif problem_type == 'regression':
-                y_pred = model.predict(X_test)
-                results[name] = mean_squared_error(y_test, y_pred)
-            else:
-                predictions = model.predict(X_test)
-                results[name] = silhouette_score(X_test, predictions)
+    def _model_fit_started(self, name):
+        self.instrumentation.notify_before(f'fit.{name}', 'model_fit')
+
+    def _model_fit_finished(self, name, stats):
+        # Pool workers report their own process peak, in-process fits use this process's
+        stats.setdefault('process_peak_rss', peak_rss_mb())
+        self.instrumentation.record(f'fit.{name}', 'model_fit', **stats)
+
+    def train_models(self, problem_type, X_train, X_test, y_train, y_test):
+        candidates = self.candidate_models(problem_type)
 
+        # The Keras network trains on a thread in this process while the sklearn models fit in the worker pool
+        local_models = {}
         if problem_type in ['classification', 'regression']:
-            nn_model.fit(X_train, y_train, epochs=10, batch_size=32, verbose=0)
-            self.models['neural_network'] = nn_model
-            if problem_type == 'classification':
-                y_pred = nn_model.predict(X_test).argmax(axis=1)
-                results['neural_network'] = accuracy_score(y_test, y_pred)
+            local_models['neural_network'] = lambda *arrays: self._fit_neural_network(problem_type, *arrays)
+
+        trainer = ParallelTrainer(n_jobs=self.n_jobs, timeout=self.model_timeout,
+                                  on_start=self._model_fit_started, on_finish=self._model_fit_finished)
+        start = time.perf_counter()
+        # The k sweep has no timeout, so only the trainer branches fill this in
+        timed_out = []
+        with self.instrumentation.stage('train_models', rows=len(X_train), selection=self.selection):
+            if problem_type == 'unsupervised' and self.k_selection:
+                selector = KSelector(criterion=self.k_selection, n_jobs=self.n_jobs,
+                                      on_start=self._model_fit_started, on_finish=self._model_fit_finished)
+                model, self.k_curve = selector.select(X_train)
+                self.models = {'kmeans': model}
+                results = {'kmeans': score_predictions(problem_type, X_test, y_test, model.predict(np.asarray(X_test, dtype=np.float32)))}
+            elif self.selection == 'halving' or (self.selection == 'auto' and len(X_train) >= HALVING_MIN_ROWS):
+                halving = SuccessiveHalving(trainer, factor=self.halving_factor)
+                self.models, results = halving.select(problem_type, candidates, local_models, X_train, X_test, y_train, y_test)
+                self.selection_history = halving.history
+                timed_out = halving.timed_out
             else:
-                y_pred = nn_model.predict(X_test).flatten()
-                results['neural_network'] = mean_squared_error(y_test, y_pred)
+                self.models, results = trainer.train(problem_type, candidates, X_train, X_test, y_train, y_test, local_models)
+                timed_out = trainer.timed_out
+        for name in timed_out:
+            # Dropped fits show up next to the finished ones in the records, hooks and trace
+            self.instrumentation.record(f'fit.{name}', 'model_timeout', time.time() - self.model_timeout,
+                                        self.model_timeout, timeout=self.model_timeout)
+        self.results = results
+        self.training_time_s = time.perf_counter() - start
 
         # Return both trained models and their evaluation results
         return self.models, results
 
-    def save_models(self, models ,output_dir='saved_models'):
-        os.makedirs(output_dir, exist_ok=True)
-        
-        for name, model in models.items():
-            if 'neural_network' in name:
-                model.save(f'{output_dir}/{name}.h5')
-            else:
-                with open(f'{output_dir}/{name}.pkl', 'wb') as f:
-                    pickle.dump(model, f)
+    def train_streaming(self, problem_type, dataset_path, feature_cols, target_col, **options):
+        # Out-of-core training for files that do not fit in memory, see StreamingTrainer for options
+        trainer = StreamingTrainer(problem_type, feature_cols, target_col, network_builder=self._build_neural_network, **options)
+        start = time.perf_counter()
+        with self.instrumentation.stage('train_streaming'):
+            self.models, results = trainer.train(dataset_path)
+        self.preprocessor = trainer.preprocessor
+        self.dataset_path = dataset_path
+        self.target_column, self.feature_columns = target_col, list(feature_cols)
+        self.results = results
+        self.training_time_s = time.perf_counter() - start
+        return self.models, results
+
+    def save_models(self, models, output_dir=None, dataset_path=None):
+        # Registers a new version (see model_registry.ModelRegistry) and returns its id
+        with self.instrumentation.stage('save_models'):
+            return self._save_models(models, output_dir, dataset_path)
+
+    def _save_models(self, models, output_dir, dataset_path):
+        registry = ModelRegistry(output_dir) if output_dir else self.registry
+        dataset_path = dataset_path or self.dataset_path
+        return registry.register(
+            models,
+            preprocessor=self.preprocessor,
+            metrics={name: score for name, score in self.results.items() if name in models},
+            dataset_fingerprint=DatasetCache().content_hash(dataset_path) if dataset_path else None,
+            dataset_path=dataset_path,
+            problem_type=self.problem_type,
+            target=self.target_column,
+            features=self.feature_columns,
+            training_time_s=self.training_time_s,
+        )
+
+    def run_pipeline(self, dataset_path, problem_statement, streaming=None):
+        # streaming=None picks out-of-core training when the file is too large to load
+        self.dataset_path = dataset_path
+        if streaming is None:
+            streaming = should_stream(dataset_path)
+        # Streaming runs only need a sample of rows to detect the target
+        with self.instrumentation.stage('load_dataset') as fields:
+            df = read_csv_sample(dataset_path) if streaming else load_dataset(dataset_path)
+            fields['streaming'] = streaming
+            fields['rows'] = len(df)
 
-    def run_pipeline(self, dataset_path, problem_statement):
-        df = pd.read_csv(dataset_path)
-        
         self.problem_type = self.analyze_problem_statement(problem_statement)
         print(f"Detected problem type: {self.problem_type}")
         
@@ -166,25 +333,39 @@ class AutoMLPipeline:
         print(f"Target column: {target_col}")
         print(f"Feature columns: {feature_cols}")
         
-        df_processed = self.preprocess_data(df)
-    
-        X = df_processed[feature_cols]
-        y = df_processed[target_col]       
-
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        results = self.train_models(X_train, X_test, y_train, y_test)
+        if streaming:
+            self.models, results = self.train_streaming(self.problem_type, dataset_path, feature_cols, target_col)
+        else:
+            X_train, X_test, y_train, y_test = self.split_and_preprocess(df, feature_cols, target_col)
+            self.models, results = self.train_models(self.problem_type, X_train, X_test, y_train, y_test)
 
-        self.save_models()
+        version = self.save_models(self.models)
+        print(f"Saved models as version {version} in {self.registry.root}")
         
         return results
 
 if __name__=="__main__":
-    problem_statement = "Predict the house prices based on various features like size, location, and number of rooms"
-    dataset_path = "house_prices.csv"  # Replace with your dataset path
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the AutoML pipeline on a CSV file")
+    parser.add_argument('dataset_path', nargs='?', default="house_prices.csv")
+    parser.add_argument('problem_statement', nargs='?', default="Predict the house prices based on various features like size, location, and number of rooms")
+    parser.add_argument('--trace', help="write a Chrome trace of every stage and model fit to this file")
+    parser.add_argument('--log', help="write the stage records as JSON lines to this file")
+    parser.add_argument('--profile-stage', help="stage to run under the profiler, e.g. preprocess_data")
+    parser.add_argument('--profiler', choices=['cprofile', 'tracemalloc'], default='cprofile')
+    args = parser.parse_args()
 
-    pipeline = AutoMLPipeline()
-    results = pipeline.run_pipeline(dataset_path, problem_statement)
+    pipeline = AutoMLPipeline(instrumentation=Instrumentation(args.profile_stage, args.profiler))
+    results = pipeline.run_pipeline(args.dataset_path, args.problem_statement)
     print("\nModel Performance:")
     for model, score in results.items():
-        print(f"{model}: {score:.5f}")
\ No newline at end of file
+        print(f"{model}: {score:.5f}")
+
+    print("\nStage timings:")
+    for record in pipeline.instrumentation.records:
+        print(f"{record['name']}: {record['wall_s']:.3f}s")
+    if args.trace:
+        pipeline.instrumentation.write_chrome_trace(args.trace)
+    if args.log:
+        pipeline.instrumentation.write_jsonl(args.log)
\ No newline at end of file
@@ -0,0 +1,106 @@
+import numpy as np
+
+# Charts are drawn from these aggregates, so drawing cost depends on the bin/grid sizes and
+# not on the row count; only the single vectorized pass that builds them sees every row
+HIST_MAX_BINS = 100
+KDE_GRID_POINTS = 512
+# Beyond 3 bandwidths the Gaussian kernel is negligible
+KDE_CUT = 3
+BOX_WHISKER = 1.5
+# Outliers drawn per box; the most extreme ones are always among them
+FLIER_LIMIT = 500
+DENSITY_BINS = 200
+
+
+def finite_values(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
+
+
+def histogram(values, bins='auto', max_bins=HIST_MAX_BINS):
+    # (counts, edges) as sns.histplot would bin them, with at most max_bins bins
+    values = finite_values(values)
+    if not len(values):
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    edges = np.histogram_bin_edges(values, bins=bins)
+    if len(edges) - 1 > max_bins:
+        edges = np.histogram_bin_edges(values, bins=max_bins)
+    counts, edges = np.histogram(values, bins=edges)
+    return counts, edges
+
+
+def scott_bandwidth(values):
+    # Scott's rule, the default of scipy's gaussian_kde and so of seaborn
+    return float(np.std(values)) * len(values) ** (-1 / 5)
+
+
+def binned_kde(values, grid_points=KDE_GRID_POINTS, bandwidth=None, cut=KDE_CUT):
+    # Gaussian KDE on an even grid: rows are linearly binned onto the grid once, then the
+    # binned counts are convolved with the kernel through an FFT. Returns (grid, density).
+    values = finite_values(values)
+    if len(values) < 2:
+        return np.zeros(0), np.zeros(0)
+    bandwidth = bandwidth or scott_bandwidth(values)
+    if bandwidth <= 0:
+        # Every value is the same, there is no spread to estimate
+        return np.array([values[0]]), np.array([np.inf])
+    lo = float(values.min()) - cut * bandwidth
+    hi = float(values.max()) + cut * bandwidth
+    grid = np.linspace(lo, hi, grid_points)
+    delta = grid[1] - grid[0]
+
+    # Each value splits its weight between the two grid points around it
+    position = (values - lo) / delta
+    left = np.minimum(position.astype(np.int64), grid_points - 2)
+    right_weight = position - left
+    counts = (np.bincount(left, weights=1 - right_weight, minlength=grid_points)
+              + np.bincount(left + 1, weights=right_weight, minlength=grid_points))
+
+    offsets = np.arange(-(grid_points - 1), grid_points) * delta
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    size = 1 << int(np.ceil(np.log2(len(counts) + len(kernel) - 1)))
+    convolved = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    density = convolved[grid_points - 1:2 * grid_points - 1] / len(values)
+    return grid, np.maximum(density, 0)
+
+
+def box_stats(values, label='', whisker=BOX_WHISKER, flier_limit=FLIER_LIMIT, random_state=42):
+    # Quartiles, whiskers and a bounded set of outliers in the form Axes.bxp draws
+    values = finite_values(values)
+    if not len(values):
+        raise ValueError(f"No numeric values to plot for {label}")
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whisker * iqr) & (values <= q3 + whisker * iqr)]
+    fliers = values[(values < q1 - whisker * iqr) | (values > q3 + whisker * iqr)]
+    if len(fliers) > flier_limit:
+        rng = np.random.default_rng(random_state)
+        extremes = [fliers.min(), fliers.max()] if flier_limit >= 2 else []
+        sample = rng.choice(fliers, size=max(flier_limit - 2, 0), replace=False)
+        fliers = np.concatenate([extremes, sample])
+    return {
+        'label': label,
+        'q1': q1,
+        'med': median,
+        'q3': q3,
+        'whislo': inside.min(),
+        'whishi': inside.max(),
+        'fliers': fliers,
+        'mean': float(values.mean()),
+    }
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    # 2D histogram of the rows where both values are finite: (counts, x edges, y edges)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    both = np.isfinite(x) & np.isfinite(y)
+    return np.histogram2d(x[both], y[both], bins=bins)
+
+
+def sample_rows(n_rows, limit, random_state=42):
+    # Sorted positions of at most limit rows
+    if n_rows <= limit:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n_rows, size=limit, replace=False))
@@ -0,0 +1,461 @@
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, Signal
+
+from plot_aggregation import binned_kde, box_stats, density_grid, finite_values, histogram, sample_rows
+
+FIGSIZE = (6, 4)
+DPI = 100
+RENDER_WORKERS = 2
+# Above this many rows a numeric scatter is drawn as a 2D histogram
+SCATTER_MAX_POINTS = 50_000
+# Largest categories of the x feature that get a violin
+VIOLIN_MAX_GROUPS = 20
+# Violins end 2 bandwidths past the data, as seaborn's do
+VIOLIN_CUT = 2
+# Rendered PNGs kept in memory; a directory in AUTODS_PLOT_CACHE_DIR also keeps them across runs
+PLOT_CACHE_MAX_BYTES = int(os.environ.get('AUTODS_PLOT_CACHE_MAX_BYTES', 64 * 1024 ** 2))
+PLOT_CACHE_DIR = os.environ.get('AUTODS_PLOT_CACHE_DIR') or None
+PLOT_CACHE_DISK_MAX_BYTES = int(os.environ.get('AUTODS_PLOT_CACHE_DISK_MAX_BYTES', 256 * 1024 ** 2))
+
+_theme_set = False
+
+
+def plot_key(dataset_key, columns, chart, size=None):
+    # dataset_key identifies the data (content hash and row count in the GUI), size is the target widget's (w, h)
+    return (dataset_key, tuple(columns), chart, tuple(size) if size else None)
+
+
+def figure_size(size, default=FIGSIZE):
+    # Pixel size of the label the plot is shown in, as inches at DPI
+    if not size:
+        return default
+    return (size[0] / DPI, size[1] / DPI)
+
+
+def apply_theme():
+    # sns.set_theme rewrites matplotlib's global rcParams, so it runs once on the GUI thread
+    # (PlotRenderer.request) before the first render, never while a worker is drawing
+    global _theme_set
+    if not _theme_set:
+        import seaborn as sns
+        sns.set_theme(style="whitegrid")
+        _theme_set = True
+
+
+def new_figure(figsize=FIGSIZE):
+    # A standalone Agg figure per render: nothing goes through pyplot's global current figure,
+    # so renders on different threads do not draw into each other
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=figsize, dpi=DPI)
+    FigureCanvasAgg(figure)
+    return figure, figure.add_subplot()
+
+
+def figure_png(figure):
+    buffer = io.BytesIO()
+    figure.tight_layout()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def is_categorical(dtype):
+    return isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype) or dtype == object
+
+
+def palette(n_colors):
+    import seaborn as sns
+    return sns.color_palette(n_colors=max(n_colors, 1))
+
+
+def draw_binned(ax, counts, edges, color, label=None, kde=None):
+    # Bars from binned counts, the KDE (grid, density) line scaled to counts as sns.histplot(kde=True) does
+    if not len(counts):
+        return
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color=color, alpha=0.6,
+           edgecolor='white', linewidth=0.5, label=label)
+    if kde is not None and len(kde[0]) > 1:
+        grid, density = kde
+        ax.plot(grid, density * counts.sum() * (edges[1] - edges[0]), color=color)
+    ax.set_ylabel("Count")
+
+
+def draw_histogram(ax, values, color, label=None, bins='auto', kde=True):
+    counts, edges = histogram(values, bins=bins)
+    draw_binned(ax, counts, edges, color, label, binned_kde(values) if kde else None)
+
+
+def draw_counts(ax, counts, horizontal=False):
+    # counts: value_counts-style Series, bars in its order
+    labels = counts.index.astype(str)
+    colors = palette(len(counts))
+    if horizontal:
+        ax.barh(labels, counts.to_numpy(), color=colors)
+        ax.invert_yaxis()
+        ax.set_xlabel("count")
+    else:
+        ax.bar(labels, counts.to_numpy(), color=colors)
+        ax.set_ylabel("count")
+
+
+def column_counts(series):
+    # Numeric values in sorted order, others in order of appearance, as sns.countplot orders them
+    counts = series.value_counts(sort=False)
+    return counts.sort_index() if pd.api.types.is_numeric_dtype(series) else counts
+
+
+def draw_boxes(ax, named_values):
+    stats = [box_stats(values, label=str(name)) for name, values in named_values]
+    parts = ax.bxp(stats, patch_artist=True, flierprops={'marker': 'd', 'markersize': 4})
+    for patch, color in zip(parts['boxes'], palette(len(stats))):
+        patch.set_facecolor(color)
+
+
+def draw_violins(ax, named_values):
+    # Each violin is the binned KDE of its values with the quartile box and median inside
+    colors = palette(len(named_values))
+    for position, (name, values) in enumerate(named_values):
+        grid, density = binned_kde(values, cut=VIOLIN_CUT)
+        if len(grid) < 2:
+            # A single value, or one value repeated, has no spread: drawn as a line at that value
+            finite = finite_values(values)
+            if len(finite):
+                ax.hlines(finite[0], position - 0.4, position + 0.4, color=colors[position], linewidth=2)
+            continue
+        half_width = 0.4 * density / density.max()
+        ax.fill_betweenx(grid, position - half_width, position + half_width,
+                         facecolor=colors[position], edgecolor='0.3')
+        stats = box_stats(values, label=str(name), flier_limit=0)
+        ax.vlines(position, stats['whislo'], stats['whishi'], color='0.25', linewidth=1)
+        ax.vlines(position, stats['q1'], stats['q3'], color='0.25', linewidth=5)
+        ax.scatter([position], [stats['med']], color='white', s=12, zorder=3)
+    ax.set_xticks(range(len(named_values)), [str(name) for name, _ in named_values])
+    ax.set_xlim(-0.5, len(named_values) - 0.5)
+
+
+def grouped_values(x, y, max_groups=VIOLIN_MAX_GROUPS):
+    # y values split by the x category, for the largest max_groups categories in x order
+    codes, uniques = pd.factorize(x, sort=True)
+    y = np.asarray(y, dtype=np.float64)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    kept = np.sort(np.argsort(-counts, kind='stable')[:max_groups])
+    return [(uniques[code], y[codes == code]) for code in kept]
+
+
+def draw_scatter(ax, figure, x, y):
+    # Points up to SCATTER_MAX_POINTS rows; above that a 2D histogram of numeric pairs, or a
+    # sample of rows when either column is not numeric
+    import seaborn as sns
+    from matplotlib.colors import LogNorm
+
+    if len(x) <= SCATTER_MAX_POINTS:
+        sns.scatterplot(x=x, y=y, ax=ax)
+        ax.set_title("Scatter Plot")
+    elif pd.api.types.is_numeric_dtype(x) and pd.api.types.is_numeric_dtype(y):
+        counts, x_edges, y_edges = density_grid(x, y)
+        mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap='viridis', norm=LogNorm())
+        figure.colorbar(mesh, ax=ax, label="Rows")
+        ax.set_xlabel(x.name)
+        ax.set_ylabel(y.name)
+        ax.set_title(f"Scatter Density ({len(x):,} rows)")
+    else:
+        rows = sample_rows(len(x), SCATTER_MAX_POINTS)
+        sns.scatterplot(x=x.iloc[rows], y=y.iloc[rows], ax=ax)
+        ax.set_title(f"Scatter Plot (sample of {len(rows):,} rows)")
+
+
+def render_feature_plot(df, column, size=None, profile=None):
+    # Chart picked from the column's type, as shown for a clicked feature; returns PNG bytes.
+    # With the dataset's profile (dataset_profile.DatasetProfile) counts, histogram and KDE
+    # are read from it instead of the column.
+    column_profile = profile[column] if profile is not None and column in profile else None
+    dtype = df[column].dtype
+    unique_count = column_profile['unique'] if column_profile else df[column].nunique()
+    # Few enough values that the profile's top values are all of them
+    top_values = pd.Series(column_profile['top_values']) if column_profile and unique_count <= 10 else None
+    figsize = figure_size(size)
+
+    if pd.api.types.is_numeric_dtype(dtype):
+        figure, ax = new_figure(figsize)
+        if unique_count < 10:
+            draw_counts(ax, top_values.sort_index() if top_values is not None else column_counts(df[column]))
+            ax.set_xlabel(column)
+            ax.set_title(f"Count Plot: {column}")
+        else:
+            if column_profile and column_profile['histogram'] is not None:
+                draw_binned(ax, *column_profile['histogram'], color="skyblue", kde=column_profile['kde'])
+            else:
+                draw_histogram(ax, df[column], color="skyblue", bins=30)
+            ax.set_xlabel(column)
+            ax.set_title(f"Histogram: {column}")
+    elif is_categorical(dtype):
+        if unique_count <= 10:
+            figure, ax = new_figure(figure_size(size, (5, 5)))
+            counts = top_values if top_values is not None else df[column].value_counts()
+            ax.pie(counts.to_numpy(), labels=counts.index.astype(str), autopct='%1.1f%%')
+            ax.set_title(f"Pie Chart: {column}")
+        else:
+            figure, ax = new_figure(figsize)
+            if column_profile:
+                counts = pd.Series(column_profile['top_values']).iloc[:10]
+            else:
+                counts = df[column].value_counts().iloc[:10]
+            draw_counts(ax, counts, horizontal=True)
+            ax.set_ylabel(column)
+            ax.set_title(f"Top 10 Categories: {column}")
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        figure, ax = new_figure(figsize)
+        df[column].value_counts().sort_index().plot(ax=ax)
+        ax.set_title(f"Time Series: {column}")
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Count")
+    else:
+        raise ValueError("Unsupported data type for visualization.")
+    return figure_png(figure)
+
+
+def render_chart(df, chart, selected_columns, size=None):
+    # One of the custom dashboard charts over the selected columns; returns PNG bytes.
+    # Every chart is drawn from aggregates, so draw time stays flat as the row count grows.
+    figure, ax = new_figure(figure_size(size))
+    numeric_columns = [col for col in selected_columns if pd.api.types.is_numeric_dtype(df[col])]
+
+    if chart == "Histogram":
+        other_columns = [col for col in selected_columns if col not in numeric_columns]
+        if other_columns and len(selected_columns) == 1:
+            # One categorical feature: its value counts are its histogram
+            draw_counts(ax, column_counts(df[other_columns[0]]))
+            ax.set_xlabel(other_columns[0])
+            ax.set_title("Count Plot")
+            return figure_png(figure)
+        if other_columns:
+            raise Exception(f"Histogram needs numeric features, these are not: {', '.join(map(str, other_columns))}. "
+                            "Use Count Plot for categorical features.")
+        for col, color in zip(numeric_columns, palette(len(numeric_columns))):
+            draw_histogram(ax, df[col], color=color, label=col)
+        ax.legend()
+        ax.set_title("Histogram")
+
+    elif chart == "Boxplot":
+        if not numeric_columns:
+            raise Exception("Boxplot needs at least one numeric feature.")
+        draw_boxes(ax, [(col, df[col]) for col in numeric_columns])
+        if len(selected_columns) == 1:
+            ax.set_xticks([])
+            ax.set_ylabel(selected_columns[0])
+        ax.set_title("Boxplot")
+
+    elif chart == "Violin Plot":
+        if len(selected_columns) == 1:
+            if not numeric_columns:
+                raise Exception("Violin Plot needs a numeric feature.")
+            draw_violins(ax, [(selected_columns[0], df[selected_columns[0]])])
+            ax.set_xticks([])
+            ax.set_ylabel(selected_columns[0])
+        elif len(selected_columns) == 2:
+            x, y = selected_columns
+            if not pd.api.types.is_numeric_dtype(df[y]):
+                raise Exception("Violin Plot needs a numeric second feature.")
+            draw_violins(ax, grouped_values(df[x], df[y]))
+            ax.set_xlabel(x)
+            ax.set_ylabel(y)
+        else:
+            raise Exception("Violin Plot supports only 1 or 2 features.")
+
+    elif chart == "Scatter Plot":
+        if len(selected_columns) != 2:
+            raise Exception("Scatter Plot requires exactly 2 features.")
+        draw_scatter(ax, figure, df[selected_columns[0]], df[selected_columns[1]])
+
+    elif chart == "Count Plot":
+        if len(selected_columns) != 1:
+            raise Exception("Count Plot supports only 1 categorical feature.")
+        draw_counts(ax, column_counts(df[selected_columns[0]]))
+        ax.set_xlabel(selected_columns[0])
+        ax.set_title("Count Plot")
+
+    else:
+        raise Exception("Unsupported chart type.")
+    return figure_png(figure)
+
+
+class PlotCache:
+    # Rendered PNGs by plot_key, evicted least recently used first once they exceed max_bytes.
+    # With disk_dir set, entries are also written there and read back on a memory miss.
+    def __init__(self, max_bytes=PLOT_CACHE_MAX_BYTES, disk_dir=PLOT_CACHE_DIR, disk_max_bytes=PLOT_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=20).hexdigest()
+        return os.path.join(self.disk_dir, f'{digest}.png')
+
+    def _store(self, key, png):
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._data[key] = png
+            self._bytes += len(png)
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            png = self._data.get(key)
+            if png is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return png
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    png = f.read()
+            except OSError:
+                png = None
+            if png is not None:
+                # The file's mtime is its last use for disk eviction
+                os.utime(path)
+                self._store(key, png)
+                with self._lock:
+                    self.disk_hits += 1
+                return png
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, png):
+        self._store(key, png)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, path)
+            self.evict_disk()
+
+    def evict_disk(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.png'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        # Oldest first
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Shared by every renderer in the process, so the standalone explorer windows reuse plots too
+PLOT_CACHE = PlotCache()
+
+
+class PlotRenderer(QObject):
+    # Renders on a thread pool and hands PNG bytes back through signals, which Qt delivers on the
+    # GUI thread. Each target (a label showing plots) only keeps its newest request: an older one
+    # is cancelled if it has not started and its result is dropped if it has.
+    rendered = Signal(str, int, object)
+    failed = Signal(str, int, str)
+
+    def __init__(self, workers=RENDER_WORKERS, cache=PLOT_CACHE, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='plot-render')
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._latest = {}
+        self._futures = {}
+
+    def request(self, target, render, *args, cache_key=None):
+        # render(*args) must return PNG bytes; returns the request id passed to the signals.
+        # A plot already in the cache under cache_key is emitted right away without rendering.
+        apply_theme()
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            self._latest[target] = request_id
+            previous = self._futures.pop(target, None)
+            if previous is not None:
+                previous.cancel()
+        png = self.cache.get(cache_key) if cache_key is not None and self.cache is not None else None
+        if png is not None:
+            self.rendered.emit(target, request_id, png)
+            return request_id
+        with self._lock:
+            if self._latest.get(target) == request_id:
+                self._futures[target] = self._pool.submit(self._render, target, request_id, render, args, cache_key)
+        return request_id
+
+    def is_current(self, target, request_id):
+        with self._lock:
+            return self._latest.get(target) == request_id
+
+    def _render(self, target, request_id, render, args, cache_key):
+        if not self.is_current(target, request_id):
+            return
+        try:
+            png = render(*args)
+        except Exception as e:
+            if self.is_current(target, request_id):
+                self.failed.emit(target, request_id, str(e))
+            return
+        # Kept even when the request went stale, the user may come back to this plot
+        if cache_key is not None and self.cache is not None:
+            self.cache.put(cache_key, png)
+        if self.is_current(target, request_id):
+            self.rendered.emit(target, request_id, png)
+
+    def shutdown(self):
+        # Called from the owning window's closeEvent; queued renders are dropped
+        self._pool.shutdown(wait=False, cancel_futures=True)
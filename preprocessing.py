@@ -0,0 +1,139 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+
+class Preprocessor:
+    # Fitted replacement for the old fillna -> LabelEncoder -> StandardScaler steps.
+    # Everything learnt from the training rows is kept on the object, so new data is
+    # transformed with the same fill values, category codes and scaling.
+    def __init__(self, problem_type=None, target_column=None):
+        self.problem_type = problem_type
+        self.target_column = target_column
+        self.numeric_columns = []
+        self.categorical_columns = []
+        self.fill_values = {}
+        self.categories = {}
+        self.means = None
+        self.scales = None
+        self.target_fill = None
+        self.target_classes = None
+        self.target_mean = None
+        self.target_scale = None
+        self.fitted = False
+
+    @property
+    def feature_columns(self):
+        return self.numeric_columns + self.categorical_columns
+
+    @staticmethod
+    def _fill_value(data, use_mean):
+        if use_mean and pd.api.types.is_numeric_dtype(data):
+            return data.mean()
+        mode = data.mode()
+        return mode.iloc[0] if not mode.empty else 0
+
+    def fit(self, df):
+        use_mean = self.problem_type != 'classification'
+        features = df.drop(columns=[self.target_column], errors='ignore')
+        numeric = features.select_dtypes(include=['number', 'bool'])
+        self.numeric_columns = list(numeric.columns)
+        self.categorical_columns = [col for col in features.columns if col not in numeric.columns]
+        self.fill_values = {}
+        self.categories = {}
+
+        if self.numeric_columns:
+            means = numeric.mean() if use_mean else numeric.mode().iloc[0]
+            self.fill_values.update(means.fillna(0).to_dict())
+        for col in self.categorical_columns:
+            self.fill_values[col] = str(self._fill_value(features[col], use_mean=False))
+            self.categories[col] = np.unique(features[col].dropna().astype(str).to_numpy())
+
+        # Scaling statistics come from the filled and encoded training matrix
+        self.means = None
+        self.scales = None
+        matrix = self._encode(features)
+        self.means = matrix.mean(axis=0)
+        scales = matrix.std(axis=0)
+        self.scales = np.where(scales == 0, 1.0, scales)
+
+        if self.target_column in df.columns:
+            self._fit_target(df[self.target_column], use_mean)
+        self.fitted = True
+        return self
+
+    def _fit_target(self, target, use_mean):
+        self.target_classes = None
+        self.target_mean = None
+        self.target_scale = None
+        self.target_fill = self._fill_value(target, use_mean)
+        target = target.fillna(self.target_fill)
+        if self.problem_type == 'classification' or not pd.api.types.is_numeric_dtype(target):
+            self.target_classes = pd.Categorical(target).categories
+        else:
+            self.target_mean = float(target.mean())
+            scale = float(target.std(ddof=0))
+            self.target_scale = scale if scale else 1.0
+
+    def _encode(self, features):
+        matrix = np.empty((len(features), len(self.feature_columns)), dtype=np.float64)
+        n_numeric = len(self.numeric_columns)
+        if n_numeric:
+            # All numeric columns are filled in one NumPy block
+            block = features[self.numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+            fill = np.array([self.fill_values[col] for col in self.numeric_columns], dtype=np.float64)
+            missing = np.isnan(block)
+            if missing.any():
+                block[missing] = np.broadcast_to(fill, block.shape)[missing]
+            matrix[:, :n_numeric] = block
+        for i, col in enumerate(self.categorical_columns, start=n_numeric):
+            values = features[col].astype(object).where(features[col].notna(), self.fill_values[col]).astype(str)
+            # Categories unseen during fit are encoded as -1
+            matrix[:, i] = pd.Categorical(values, categories=self.categories[col]).codes
+        if self.means is not None:
+            matrix -= self.means
+            matrix /= self.scales
+        return matrix
+
+    def transform_target(self, target):
+        if isinstance(target.dtype, pd.CategoricalDtype):
+            # A chunk's categoricals only hold the values in that chunk, which may not include the fill
+            target = target.astype(object)
+        target = target.fillna(self.target_fill)
+        if self.target_classes is not None:
+            codes = pd.Categorical(target, categories=self.target_classes).codes
+            return pd.Series(codes, index=target.index, name=target.name)
+        return (target.astype(np.float64) - self.target_mean) / self.target_scale
+
+    def inverse_transform_target(self, values):
+        values = np.asarray(values)
+        if self.target_classes is not None:
+            return self.target_classes.take(values.astype(int)).to_numpy()
+        return values * self.target_scale + self.target_mean
+
+    def transform(self, df):
+        if not self.fitted:
+            raise ValueError("Preprocessor must be fitted before transform")
+        missing = [col for col in self.feature_columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        # Columns keep their original order; the target is included when present
+        columns = [col for col in df.columns if col in self.fill_values]
+        encoded = pd.DataFrame(self._encode(df), columns=self.feature_columns, index=df.index)[columns]
+        if self.target_column in df.columns:
+            encoded[self.target_column] = self.transform_target(df[self.target_column])
+            encoded = encoded[[col for col in df.columns if col in encoded.columns]]
+        return encoded
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
@@ -0,0 +1,156 @@
+import os
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier, SGDRegressor
+from sklearn.cluster import MiniBatchKMeans
+
+from data_loader import CHUNK_SIZE, SAMPLE_ROWS, iter_csv_chunks, read_csv_sample
+from preprocessing import Preprocessor
+from training_engine import score_predictions
+
+# Files above this size are trained from disk instead of being loaded into memory
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('AUTODS_STREAMING_THRESHOLD_BYTES', 1024 ** 3))
+
+
+def should_stream(path):
+    return os.path.getsize(path) > STREAMING_THRESHOLD_BYTES
+
+
+class ReservoirSample:
+    # Uniform sample of at most `capacity` rows from a stream of unknown length (algorithm R)
+    def __init__(self, capacity, random_state=42):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(random_state)
+        self.seen = 0
+        self.X = None
+        self.y = None
+
+    def add(self, X, y):
+        if not len(X):
+            return
+        if self.X is None:
+            self.X = np.empty((self.capacity, X.shape[1]), dtype=X.dtype)
+            self.y = np.empty(self.capacity, dtype=y.dtype)
+
+        positions = self.seen + np.arange(len(X))
+        # Rows that arrive while the reservoir is filling are always kept
+        fill = positions < self.capacity
+        self.X[positions[fill]] = X[fill]
+        self.y[positions[fill]] = y[fill]
+        # Later rows replace a random slot with probability capacity / (position + 1)
+        slots = (self.rng.random(len(X)) * (positions + 1)).astype(np.int64)
+        replace = ~fill & (slots < self.capacity)
+        self.X[slots[replace]] = X[replace]
+        self.y[slots[replace]] = y[replace]
+        self.seen += len(X)
+
+    def arrays(self):
+        if self.X is None:
+            return np.empty((0, 0), dtype=np.float32), np.empty(0)
+        size = min(self.seen, self.capacity)
+        return self.X[:size], self.y[:size]
+
+
+class StreamingTrainer:
+    def __init__(self, problem_type, feature_cols, target_col, chunksize=CHUNK_SIZE, test_size=0.2,
+                 max_test_rows=20_000, epochs=1, batch_size=32, random_state=42, network_builder=None):
+        # network_builder: callable(problem_type, n_features, n_classes) returning a compiled Keras model
+        self.problem_type = problem_type
+        self.feature_cols = feature_cols
+        self.target_col = target_col
+        self.chunksize = chunksize
+        self.test_size = test_size
+        self.max_test_rows = max_test_rows
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.network_builder = network_builder
+        self.preprocessor = None
+        self.classes = None
+
+    def _incremental_models(self):
+        if self.problem_type == 'classification':
+            return {
+                'sgd_classifier': SGDClassifier(loss='log_loss', random_state=self.random_state)
+            }
+        elif self.problem_type == 'regression':
+            return {
+                'sgd_regressor': SGDRegressor(random_state=self.random_state)
+            }
+        elif self.problem_type == 'unsupervised':
+            return {
+                'kmeans': MiniBatchKMeans(n_clusters=3, random_state=self.random_state)
+            }
+        return {}
+
+    def _batches(self, path):
+        # Yields (X_train, y_train, X_test, y_test) for every chunk. The test mask is seeded by
+        # chunk index, so every pass over the file holds out exactly the same rows.
+        columns = self.feature_cols + [self.target_col]
+        for index, chunk in enumerate(iter_csv_chunks(path, self.chunksize, usecols=columns)):
+            processed = self.preprocessor.transform(chunk[columns])
+            X = processed[self.feature_cols].to_numpy(dtype=np.float32)
+            y = processed[self.target_col].to_numpy()
+            if self.classes is not None:
+                # Labels that were not in the fitting sample cannot be learnt incrementally
+                known = y >= 0
+                X, y = X[known], y[known]
+            test = np.random.default_rng([self.random_state, index]).random(len(X)) < self.test_size
+            yield X[~test], y[~test], X[test], y[test]
+
+    def _fit_network(self, path, n_features):
+        import tensorflow as tf
+        from neural_training import configure_threads
+
+        configure_threads()
+        y_dtype = tf.int32 if self.classes is not None else tf.float32
+        n_classes = len(self.classes) if self.classes is not None else None
+        nn_model = self.network_builder(self.problem_type, n_features, n_classes)
+
+        def train_rows():
+            for X_train, y_train, _, _ in self._batches(path):
+                yield X_train, y_train.astype(y_dtype.as_numpy_dtype)
+
+        # Chunks are re-batched to the Keras batch size, only one chunk is held at a time
+        dataset = tf.data.Dataset.from_generator(train_rows, output_signature=(
+            tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=y_dtype),
+        )).unbatch().batch(self.batch_size).prefetch(tf.data.AUTOTUNE)
+        nn_model.fit(dataset, epochs=self.epochs, verbose=0)
+        return nn_model
+
+    def train(self, path):
+        columns = self.feature_cols + [self.target_col]
+        # Fill values, category codes and scaling come from the head of the file
+        sample = read_csv_sample(path, SAMPLE_ROWS, usecols=columns)
+        self.preprocessor = Preprocessor(self.problem_type, self.target_col).fit(sample[columns])
+        if self.problem_type == 'classification':
+            self.classes = np.arange(len(self.preprocessor.target_classes))
+
+        models = self._incremental_models()
+        holdout = ReservoirSample(self.max_test_rows, self.random_state)
+        for epoch in range(self.epochs):
+            for X_train, y_train, X_test, y_test in self._batches(path):
+                if epoch == 0:
+                    holdout.add(X_test, y_test)
+                if not len(X_train):
+                    continue
+                for model in models.values():
+                    if self.classes is not None:
+                        model.partial_fit(X_train, y_train, classes=self.classes)
+                    else:
+                        model.partial_fit(X_train, y_train)
+
+        if self.network_builder is not None and self.problem_type in ['classification', 'regression']:
+            models['neural_network'] = self._fit_network(path, len(self.feature_cols))
+
+        X_test, y_test = holdout.arrays()
+        if not len(X_test):
+            raise ValueError("No rows were held out to score the models on; the file has too few rows or test_size is 0")
+        results = {}
+        for name, model in models.items():
+            y_pred = model.predict(X_test)
+            if name == 'neural_network':
+                y_pred = y_pred.argmax(axis=1) if self.classes is not None else y_pred.flatten()
+            results[name] = score_predictions(self.problem_type, X_test, y_test, y_pred)
+        return models, results
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtWidgets import QDialog, QTableView, QVBoxLayout, QAbstractItemView
+
+# Rows handed to the view per fetchMore call while the user scrolls
+FETCH_ROWS = 1_000
+
+
+def format_value(value):
+    # Dicts (like Top 5 Values) are shown as "key: value" lists
+    if isinstance(value, dict):
+        return ', '.join(f"{k}: {v}" for k, v in value.items())
+    return str(value)
+
+
+class DataFrameModel(QAbstractTableModel):
+    # Read-only view of a DataFrame: cells are read from the column arrays and formatted only
+    # when the view paints them, so no per-cell items exist and row count does not matter
+    def __init__(self, df, parent=None):
+        super().__init__(parent)
+        self._df = df
+        self._columns = {}
+        # Position of the row shown at each view row, replaced when the view is sorted
+        self._order = np.arange(len(df))
+        self._loaded = min(FETCH_ROWS, len(df))
+
+    def _column(self, col):
+        # The column's own backing array, looked up once: no copy or conversion of the column,
+        # categoricals as (codes, categories) so only a shown cell's category is looked up
+        values = self._columns.get(col)
+        if values is None:
+            series = self._df.iloc[:, col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = (series.cat.codes.array, series.cat.categories)
+            else:
+                values = series.array
+            self._columns[col] = values
+        return values
+
+    def _value(self, col, row):
+        values = self._column(col)
+        if isinstance(values, tuple):
+            codes, categories = values
+            code = codes[row]
+            return categories[code] if code >= 0 else np.nan
+        return values[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._df.shape[1]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._df)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(FETCH_ROWS, len(self._df) - self._loaded)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return format_value(self._value(index.column(), self._order[index.row()]))
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return str(self._df.columns[section])
+        return str(self._df.index[self._order[section]])
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0:
+            # No sort column: back to the frame's own order
+            self.layoutAboutToBeChanged.emit()
+            self._order = np.arange(len(self._df))
+            self.layoutChanged.emit()
+            return
+        values = self._df.iloc[:, column].reset_index(drop=True)
+        try:
+            ordered = values.sort_values(ascending=order == Qt.AscendingOrder, kind='stable', na_position='last')
+        except TypeError:
+            # Mixed types in an object column are compared as text
+            ordered = values.astype(str).sort_values(ascending=order == Qt.AscendingOrder, kind='stable')
+        self.layoutAboutToBeChanged.emit()
+        self._order = ordered.index.to_numpy()
+        self.layoutChanged.emit()
+
+
+def replace_table_widget(table_widget):
+    # The designer file places a QTableWidget; a QTableView with the same geometry and style
+    # takes its place so a DataFrameModel can back it
+    view = QTableView(table_widget.parentWidget())
+    view.setGeometry(table_widget.geometry())
+    view.setStyleSheet(table_widget.styleSheet())
+    view.setHorizontalScrollBarPolicy(table_widget.horizontalScrollBarPolicy())
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    view.horizontalHeader().setMinimumSectionSize(table_widget.horizontalHeader().minimumSectionSize())
+    view.horizontalHeader().setDefaultSectionSize(table_widget.horizontalHeader().defaultSectionSize())
+    # Rows keep their original order until a header is clicked
+    view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+    view.setSortingEnabled(True)
+    table_widget.hide()
+    view.show()
+    return view
+
+
+class DataPreviewDialog(QDialog):
+    # Full dataset grid; opens immediately for any row count since rows are fetched while scrolling
+    def __init__(self, df, title="Data Preview", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"{title} ({len(df):,} rows x {df.shape[1]} columns)")
+        self.resize(1000, 600)
+        self.view = QTableView(self)
+        self.view.setModel(DataFrameModel(df, self.view))
+        self.view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.view.setSortingEnabled(True)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Fixed row height, so the view does not measure rows as they are fetched
+        self.view.verticalHeader().setDefaultSectionSize(24)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.view)
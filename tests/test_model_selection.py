@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_selection import SuccessiveHalving
+from training_engine import ParallelTrainer
+
+N_ROWS = 2000
+
+
+def slow_on_subsets(name):
+    # Local model that runs past the trainer's timeout on every rung's subsample
+    # but finishes at once on the full training set
+    def fit(X_train, X_test, y_train, y_test):
+        if len(X_train) < N_ROWS:
+            time.sleep(1.0)
+        return name, 0.5
+    return fit
+
+
+def test_rung_where_every_model_times_out_keeps_the_survivors():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(N_ROWS, 3))
+    y = rng.integers(0, 2, N_ROWS)
+    local_models = {name: slow_on_subsets(name) for name in ['a', 'b', 'c']}
+    halving = SuccessiveHalving(ParallelTrainer(timeout=0.2), factor=3, min_rows=100)
+
+    models, results = halving.select('classification', {}, local_models, X, X[:100], y, y[:100])
+
+    assert halving.history[0]['scores'] == {}
+    assert sorted(halving.history[0]['timed_out']) == ['a', 'b', 'c']
+    # Timeouts on a rung are kept after the final fit resets the trainer's list
+    assert sorted(halving.timed_out) == ['a', 'b', 'c']
+    assert len(halving.history) == 1
+    assert sorted(models) == ['a', 'b', 'c']
+    assert sorted(results) == ['a', 'b', 'c']
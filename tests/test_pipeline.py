@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import AutoMLPipeline
+
+
+def test_train_models_with_k_selection():
+    rng = np.random.default_rng(0)
+    X = np.vstack([rng.normal(center, 0.1, size=(50, 2)) for center in (0, 5, 10)])
+    pipeliner = AutoMLPipeline(k_selection='elbow')
+
+    models, results = pipeliner.train_models('unsupervised', X, X, None, None)
+
+    assert list(models) == ['kmeans']
+    assert 'kmeans' in results
+    assert pipeliner.k_curve
+    # Every k fit is reported through the instrumentation hooks
+    assert {'fit.kmeans_k2', 'fit.kmeans_k3'} <= {record['name'] for record in pipeliner.instrumentation.records}
+
+
+def test_k_selection_needs_more_rows_than_clusters():
+    pipeliner = AutoMLPipeline(k_selection='elbow')
+    X = np.array([[0.0, 1.0], [1.0, 0.0]])
+
+    with pytest.raises(ValueError, match='Cannot select k for 2 rows'):
+        pipeliner.train_models('unsupervised', X, X, None, None)
@@ -0,0 +1,218 @@
+import os
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import multiprocessing as mp
+
+import numpy as np
+from sklearn.metrics import accuracy_score, mean_squared_error
+
+from clustering_metrics import estimate_silhouette
+from instrumentation import RssSampler, peak_rss_mb
+
+ARRAY_NAMES = ['X_train', 'X_test', 'y_train', 'y_test']
+# Below this many training cells (rows x features) starting spawn processes costs more than it saves,
+# so models are fitted inline unless a timeout has to be enforced
+PARALLEL_MIN_CELLS = int(os.environ.get('AUTODS_PARALLEL_MIN_CELLS', 1_000_000))
+# How often the parent checks for started, finished and overdue jobs
+POLL_SECONDS = 0.05
+# Problem types whose score (see score_predictions) is better when smaller
+LOWER_IS_BETTER = {'regression'}
+
+def score_predictions(problem_type, X_test, y_test, y_pred):
+    if problem_type == 'classification':
+        return accuracy_score(y_test, y_pred)
+    elif problem_type == 'regression':
+        return mean_squared_error(y_test, y_pred)
+    # Exact silhouette on small test sets, a sampled estimate on large ones
+    return estimate_silhouette(np.asarray(X_test, dtype=np.float64), np.asarray(y_pred))[0]
+
+
+def fit_and_score(problem_type, model, X_train, X_test, y_train, y_test):
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return model, score_predictions(problem_type, X_test, y_test, y_pred)
+
+
+def _timed_fit(problem_type, model, arrays):
+    stats = {'start': time.time(), 'pid': os.getpid(), 'thread': threading.get_ident(), 'rows': len(arrays[0])}
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with RssSampler() as sampler:
+        model, score = fit_and_score(problem_type, model, *arrays)
+    stats['wall_s'] = time.perf_counter() - wall_start
+    stats['cpu_s'] = time.process_time() - cpu_start
+    stats['peak_rss'] = sampler.peak
+    return model, score, stats
+
+
+def write_shared_arrays(array_dir, arrays):
+    # arrays: name -> array, written once so worker processes can memory-map them
+    for name, array in arrays.items():
+        np.save(os.path.join(array_dir, f'{name}.npy'), np.ascontiguousarray(array))
+
+
+def read_shared_arrays(array_dir, names=ARRAY_NAMES):
+    # Arrays are opened read-only from the memory-mapped files, so every worker
+    # reads the same pages from the OS cache instead of receiving its own copy
+    return [np.load(os.path.join(array_dir, f'{name}.npy'), mmap_mode='r') for name in names]
+
+
+def _fit_in_process(messages, name, model, problem_type, array_dir):
+    # The parent starts the model's timeout when 'started' arrives, after this process has
+    # imported its modules, not when the process was launched
+    messages.put(('started', name, None))
+    try:
+        arrays = read_shared_arrays(array_dir)
+        model, score, stats = _timed_fit(problem_type, model, arrays)
+        stats['process_peak_rss'] = peak_rss_mb()
+    except Exception as e:
+        messages.put(('failed', name, e))
+        return
+    messages.put(('finished', name, (model, score, stats)))
+
+
+class ParallelTrainer:
+    def __init__(self, n_jobs=None, timeout=None, on_start=None, on_finish=None):
+        # n_jobs: sklearn models fitted at once, each in its own process (None = one per CPU).
+        #   Without a timeout, n_jobs=1 or less than PARALLEL_MIN_CELLS of training data trains inline
+        # timeout: seconds a model may run, counted from when it starts, before it is dropped from
+        #   the results. A model process past it is killed, the others keep running; local models
+        #   (threads) cannot be stopped, so one past its timeout is dropped but keeps running in the
+        #   background until its fit ends
+        # on_start(name) / on_finish(name, stats): called in this process when a model starts and
+        #   finishes, stats holds start, wall_s, cpu_s, rows, pid, thread and, except for local models,
+        #   peak_rss sampled during the fit (and the process_peak_rss of the model's process)
+        self.n_jobs = n_jobs
+        self.timeout = timeout
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.timings = {}
+        self.timed_out = []
+
+    def _n_workers(self, n_models):
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+        return max(1, min(n_jobs, n_models))
+
+    def train(self, problem_type, models, X_train, X_test, y_train, y_test, local_models=None):
+        # models: name -> unfitted sklearn estimator, fitted in worker processes
+        # local_models: name -> callable(X_train, X_test, y_train, y_test) returning (model, score),
+        #   run on a thread in this process (used for the TensorFlow network, which manages
+        #   its own thread pool and should not be imported into every worker)
+        local_models = local_models or {}
+        self.timings = {}
+        self.timed_out = []
+        arrays = [np.ascontiguousarray(array) for array in (X_train, X_test, y_train, y_test)]
+
+        local_results = {}
+        local_errors = {}
+        threads = []
+        for name, fit_fn in local_models.items():
+            thread = threading.Thread(target=self._run_local, args=(name, fit_fn, arrays, local_results, local_errors), daemon=True)
+            thread.start()
+            threads.append((name, thread, time.monotonic()))
+
+        # A timeout can only be enforced on a separate process
+        small = np.asarray(arrays[0]).size < PARALLEL_MIN_CELLS
+        if self.timeout is None and (small or self._n_workers(len(models)) == 1):
+            fitted = self._train_inline(problem_type, models, arrays)
+        else:
+            fitted = self._train_processes(problem_type, models, arrays)
+
+        for name, thread, started in threads:
+            thread.join(None if self.timeout is None else max(0, started + self.timeout - time.monotonic()))
+            if thread.is_alive():
+                self.timed_out.append(name)
+            elif name in local_errors:
+                raise local_errors[name]
+            else:
+                fitted[name] = local_results[name]
+
+        trained, results = {}, {}
+        for name in list(models) + list(local_models):
+            if name in fitted:
+                trained[name], results[name] = fitted[name]
+        return trained, results
+
+    def _started(self, name):
+        if self.on_start is not None:
+            self.on_start(name)
+
+    def _finished(self, name, stats):
+        self.timings[name] = stats['wall_s']
+        if self.on_finish is not None:
+            self.on_finish(name, stats)
+
+    def _run_local(self, name, fit_fn, arrays, local_results, local_errors):
+        self._started(name)
+        stats = {'start': time.time(), 'pid': os.getpid(), 'thread': threading.get_ident(), 'rows': len(arrays[0])}
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            local_results[name] = fit_fn(*arrays)
+        except Exception as e:
+            local_errors[name] = e
+            return
+        stats['wall_s'] = time.perf_counter() - wall_start
+        stats['cpu_s'] = time.thread_time() - cpu_start
+        self._finished(name, stats)
+
+    def _train_inline(self, problem_type, models, arrays):
+        fitted = {}
+        for name, model in models.items():
+            self._started(name)
+            model, score, stats = _timed_fit(problem_type, model, arrays)
+            fitted[name] = (model, score)
+            self._finished(name, stats)
+        return fitted
+
+    def _train_processes(self, problem_type, models, arrays):
+        # One process per model, at most _n_workers at a time, so a model past its timeout is
+        # killed on its own and the others keep their progress
+        array_dir = tempfile.mkdtemp(prefix='autods_arrays_')
+        context = mp.get_context('spawn')
+        messages = context.Queue()
+        waiting = list(models.items())
+        n_workers = self._n_workers(len(models))
+        running = {}
+        started = {}
+        fitted = {}
+        try:
+            write_shared_arrays(array_dir, dict(zip(ARRAY_NAMES, arrays)))
+            while waiting or running:
+                while waiting and len(running) < n_workers:
+                    name, model = waiting.pop(0)
+                    process = context.Process(target=_fit_in_process, args=(messages, name, model, problem_type, array_dir), daemon=True)
+                    process.start()
+                    running[name] = process
+                try:
+                    kind, name, payload = messages.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    kind = None
+                if kind == 'started':
+                    started[name] = time.monotonic()
+                    self._started(name)
+                elif kind == 'finished':
+                    model, score, stats = payload
+                    fitted[name] = (model, score)
+                    self._finished(name, stats)
+                    running.pop(name).join()
+                elif kind == 'failed':
+                    raise payload
+                for name, process in list(running.items()):
+                    if self.timeout is not None and name in started and time.monotonic() - started[name] > self.timeout:
+                        process.kill()
+                        process.join()
+                        del running[name]
+                        self.timed_out.append(name)
+                    elif process.exitcode not in (None, 0):
+                        raise RuntimeError(f"Fitting {name} stopped with exit code {process.exitcode}")
+        finally:
+            for process in running.values():
+                process.kill()
+                process.join()
+            messages.close()
+            shutil.rmtree(array_dir, ignore_errors=True)
+        return fitted
@@ -1,15 +1,19 @@
 import sys
 import os
+import threading
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 
 from PySide6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QListWidget, QTextEdit, QLabel, QFileDialog, QPushButton
+    QApplication, QWidget, QVBoxLayout, QListWidget, QTextEdit, QLabel, QFileDialog, QPushButton, QMessageBox
 )
 from PySide6.QtGui import QPixmap
 from PySide6.QtCore import Qt
 
+import dataset_cache
+from dataset_loading import DatasetLoader
+from dataset_profile import ProfileWorker, cached_profile, describe_column
+from plot_rendering import PlotRenderer, plot_key, render_feature_plot
+
 
 class DatasetExplorer(QWidget):
     def __init__(self):
@@ -36,13 +40,64 @@ class DatasetExplorer(QWidget):
         self.layout.addWidget(self.plot_label)
 
         self.df = None
+        self.dataset_key = None
+        self.profile = None
+
+        # Plots are drawn off the GUI thread; clicking another feature drops the pending one
+        self.renderer = PlotRenderer(parent=self)
+        self.renderer.rendered.connect(self.show_rendered_plot)
+        self.renderer.failed.connect(self.show_plot_error)
 
     def load_dataset(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open CSV", "", "CSV Files (*.csv)")
         if file_path:
-            self.df = pd.read_csv(file_path)
-            self.feature_list.clear()
-            self.feature_list.addItems(self.df.columns)
+            # Parsed in the background, the button shows the progress
+            self.file_path = file_path
+            self.load_button.setEnabled(False)
+            self.load_button.setText("Loading...")
+            self.loader = DatasetLoader(file_path)
+            self.loader.progress.connect(self.handle_load_progress)
+            self.loader.finished.connect(self.handle_dataset_loaded)
+            self.loader.error.connect(self.handle_load_error)
+            threading.Thread(target=self.loader.run, daemon=True).start()
+
+    def handle_load_progress(self, percent):
+        self.load_button.setText(f"Loading... {percent}%")
+
+    def handle_dataset_loaded(self, df):
+        self.load_button.setEnabled(True)
+        self.load_button.setText("Load CSV Dataset")
+        self.df = df
+        # Identifies the data in the plot cache, the file was hashed while it was loaded
+        self.dataset_key = (dataset_cache.DatasetCache().content_hash(self.file_path), len(df))
+        # Column statistics for the info box and plots, built in the background
+        self.profile = None
+        self.profile_worker = ProfileWorker(df, self.dataset_key)
+        self.profile_worker.finished.connect(self.handle_profile_ready)
+        self.profile_worker.error.connect(self.handle_profile_error)
+        threading.Thread(target=self.profile_worker.run, daemon=True).start()
+        self.feature_list.clear()
+        self.feature_list.addItems(df.columns)
+
+    def handle_load_error(self, error_msg):
+        self.load_button.setEnabled(True)
+        self.load_button.setText("Load CSV Dataset")
+        QMessageBox.critical(self, "Load Error", error_msg)
+
+    def handle_profile_ready(self, key, profile):
+        # Ignored when another dataset was loaded while it was being built
+        if key == self.dataset_key:
+            self.profile = profile
+
+    def handle_profile_error(self, key, error_msg):
+        if key == self.dataset_key:
+            QMessageBox.warning(self, "Profile Error", f"Could not compute column statistics: {error_msg}")
+
+    def dataset_profile(self):
+        # Waits for the background build when the info box needs the profile before it is ready
+        if self.profile is None:
+            self.profile = cached_profile(self.df, self.dataset_key)
+        return self.profile
 
     def display_feature_info(self, item):
         col = item.text()
@@ -52,10 +107,11 @@ class DatasetExplorer(QWidget):
             self.visualize_feature(self.df, col)
 
     def get_feature_info(self, df, col):
-        dtype = df[col].dtype
-        unique_vals = df[col].nunique()
-        missing = df[col].isnull().sum()
-        desc = df[col].describe(include='all')
+        profile = self.dataset_profile()[col]
+        dtype = profile['dtype']
+        unique_vals = profile['unique']
+        missing = profile['nulls']
+        desc = describe_column(profile, col)
 
         info = f"📊 Feature: {col}\n"
         info += f"Data Type: {dtype}\n"
@@ -65,44 +121,24 @@ class DatasetExplorer(QWidget):
         return info
 
     def visualize_feature(self, df: pd.DataFrame, column: str):
-        plt.clf()
-        plt.figure(figsize=(6, 4))
-        sns.set_theme(style="whitegrid")
-
-        dtype = df[column].dtype
-        unique_count = df[column].nunique()
-
-        try:
-            if pd.api.types.is_numeric_dtype(dtype):
-                if unique_count < 10:
-                    sns.countplot(x=column, data=df)
-                    plt.title(f"Count Plot: {column}")
-                else:
-                    sns.histplot(df[column].dropna(), kde=True, bins=30, color="skyblue")
-                    plt.title(f"Histogram: {column}")
-            elif pd.api.types.is_categorical_dtype(dtype) or dtype == object:
-                if unique_count <= 10:
-                    df[column].value_counts().plot.pie(autopct='%1.1f%%', figsize=(5, 5))
-                    plt.ylabel('')
-                    plt.title(f"Pie Chart: {column}")
-                else:
-                    sns.countplot(y=column, data=df, order=df[column].value_counts().index[:10])
-                    plt.title(f"Top 10 Categories: {column}")
-            elif pd.api.types.is_datetime64_any_dtype(dtype):
-                df[column].value_counts().sort_index().plot()
-                plt.title(f"Time Series: {column}")
-                plt.xlabel("Date")
-                plt.ylabel("Count")
-            else:
-                self.plot_label.setText("❌ Unsupported data type for visualization.")
-                return
-
-            img_path = "feature_plot.png"
-            plt.tight_layout()
-            plt.savefig(img_path)
-            self.plot_label.setPixmap(QPixmap(img_path))
-        except Exception as e:
-            self.plot_label.setText(f"⚠️ Error generating plot: {e}")
+        self.plot_label.setText(f"Rendering {column}...")
+        size = (self.plot_label.width(), self.plot_label.height())
+        self.renderer.request('feature', render_feature_plot, df, column, size, self.profile,
+                              cache_key=plot_key(self.dataset_key, [column], 'feature', size))
+
+    def closeEvent(self, event):
+        self.renderer.shutdown()
+        super().closeEvent(event)
+
+    def show_rendered_plot(self, target, request_id, png):
+        if self.renderer.is_current(target, request_id):
+            pixmap = QPixmap()
+            pixmap.loadFromData(png, 'PNG')
+            self.plot_label.setPixmap(pixmap)
+
+    def show_plot_error(self, target, request_id, message):
+        if self.renderer.is_current(target, request_id):
+            self.plot_label.setText(f"⚠️ Error generating plot: {message}")
 
 
 if __name__ == "__main__":